@@ -1,37 +1,15 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.figure_factory as ff
-import os
-import base64
-import seaborn as sns
-import pandas as pd
+from instrumentation import admin_panel, is_admin, start_trace
+from user_store import load_user_store
+from warmup import start_warm_up
 
 
 st.set_page_config(page_title="Sales Analytics", layout="wide")
 
 
-df = pd.read_csv("Wallmart.csv")
-
-df['date'] = pd.to_datetime(df['date'], dayfirst=True, errors='coerce')
-df.columns = df.columns.str.strip()
-df["Revenue"] = df["Revenue"].replace('[\$,]', '', regex=True).astype(float)
-df["Profit"] = df["Profit"].replace('[\$,]', '', regex=True).astype(float)
-
-user_data_file = "user_data.csv"
-
-# Create user data file if not exists
-if not os.path.exists(user_data_file):
-    auth_df = pd.DataFrame(columns=['Email', 'Password'])
-    auth_df.to_csv(user_data_file, index=False)
-else:
-    auth_df = pd.read_csv(user_data_file, dtype={'Email': str, 'Password': str})
-
-# Ensure all values are treated as strings
-auth_df['Email'] = auth_df['Email'].astype(str).str.strip()
-auth_df['Password'] = auth_df['Password'].astype(str).str.strip()
+# Accounts in SQLite (unique email index, salted password hashes), opened once per process
+user_store = load_user_store()
 
 # Session state for authentication
 if "authenticated" not in st.session_state:
@@ -51,448 +29,485 @@ with st.sidebar:
                                icons=["person-plus", "key"], menu_icon="house",
                                default_index=0)
 
-# 📌 **Register Page**
-if selected == "Register":
-    st.header("📝 Create an Account")
-    reg_email = st.text_input("📧Enter Your Email").strip()
-    reg_password = st.text_input("🔒Enter Your Password", type="password").strip()
-    register_button = st.button("Register")
-
-    if register_button:
-        if reg_email and reg_password:
-            if reg_email in auth_df['Email'].values:
-                st.error("⚠️ Email Already Exists. Please Login")
+# Columns each analytics section charts (None = every column)
+SECTION_COLUMNS = {
+    "Sales Overview": ["City", "category", "date", "datetime", "Revenue", "Profit", "rating"],
+    "Customer Insights": ["City", "payment_method", "rating"],
+    "Product Performance": ["category", "datetime", "Profit"],
+    "Branch Performance": None,
+    "Dataset": None,
+}
+
+# Timings, row counts and payload sizes of this rerun's stages
+trace = start_trace(selected, detailed=is_admin(st.session_state.user_id))
+try:
+    if st.session_state.authenticated:
+        # Load the data in the background while the user is still on the Welcome page
+        start_warm_up(SECTION_COLUMNS)
+
+    if selected in SECTION_COLUMNS or selected == "Key Insights":
+        # Data and plotting modules are imported on the first visit to an analytics section,
+        # so the Register/Login pages start without them
+        from branch_search import BRANCH_PREVIEW_ROWS, load_branch_search
+        import charts
+        from data_loader import OUT_OF_CORE, load_sales_data
+        from dataset_view import PAGE_SIZES
+        from filters import is_selected, load_filter_index
+        from insights import load_insights
+        from out_of_core import load_scan_engine
+        from query_cache import cached_query
+        from rollup import filter_cube, kpis, load_cube, rollup
+        from timeseries import GRANULARITIES
+
+    if selected in SECTION_COLUMNS:
+        # Day x Branch x City x category x payment rollups that answer the KPIs and aggregate charts
+        with trace.stage("load") as stage:
+            cube = load_cube()
+            # Row-level filters, histograms and tables: streamed from Parquet in out-of-core mode, otherwise
+            # indexed over the data loaded once per process with only this section's columns (read-only, shared)
+            if OUT_OF_CORE:
+                engine = load_scan_engine(cube)
             else:
-                new_entry = pd.DataFrame({'Email': [reg_email], 'Password': [reg_password]})
-                auth_df = pd.concat([auth_df, new_entry], ignore_index=True)
-                auth_df.to_csv(user_data_file, index=False)
-                st.success("✅ Registration Successful! You can now log in.")
-        else:
-            st.error("Please enter both email and password")
-
-# 🔓 **Login Page**
-if selected == "Login":
-    st.header("🔓 Login to Dashboard")
-    email = st.text_input("📧Enter Your Email").strip()
-    password = st.text_input("🔒Enter Your Password", type="password").strip()
-    login_button = st.button("Login")
-
-    if login_button:
-        email = str(email).strip()
-        password = str(password).strip()
-
-        user = auth_df[(auth_df['Email'] == email) & (auth_df['Password'] == password)]
-        if not user.empty:
-            st.session_state.authenticated = True
-            st.session_state.user_id = email
-            st.success("✅ Login Successful! Redirecting to Welcome Page...")
-            st.rerun()  # Refresh page after login
-        else:
-            st.error("❌ Invalid email or password")
-
-# 🏠 **Welcome Page After Login**
-if selected == "Welcome" and st.session_state.authenticated:
-    st.markdown(
-        """
-        <style>
-        .welcome-header {
-            font-size: 36px;
-            font-weight: bold;
-            text-align: center;
-            background: linear-gradient(to right, #ff6a00, #ee0979);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-        }
-        .sub-header {
-            font-size: 24px;
-            font-weight: bold;
-            text-align: center;
-            color: #444;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
-    st.markdown(f'<h1 class="welcome-header">🎉 Welcome to 🛒 <br>'
-                f'Intelligent Sales Analytics Dashboard </h1>', unsafe_allow_html=True)
-    st.markdown('<h5 class="sub-header">Explore dynamic sales trends, customer behavior, and performance insights.<br>'
-                'Use the sidebar to navigate and discover deep analytics through interactive visualizations.</h5>',
-                unsafe_allow_html=True)
-
-    # Info Message in a Styled Container
-    # st.header("🎉 Welcome to Sales Analytics Dashboard")
-    # st.subheader(f"Hello, {st.session_state.user_id} 👋")
-    st.info("✅ You are now logged in and can explore the dashboard. Use the sidebar to navigate different sections of the dashboard.")
-
-# -----------------------------------------------------------------------------------------------------------------------#
-
-if selected == "Sales Overview":
-    st.header("Overview of Walmart Sales Analytics Dashboard!")
-
-    col1, col2, col3 = st.columns(3)
-    # 🔍 **Filter: Select Region**
-    with col1:
-        selected_city = st.selectbox("🌍 Select City:", options=["All"] + sorted(df["City"].unique()), index=0)
-
-    with col2:
-        selected_category = st.selectbox(" Select Category", options=["All"] + sorted(df["category"].unique()), index=0)
-
-    # 📅 **Filter to Select Date Range**
-    with col3:
-        min_date, max_date = df["date"].min(), df["date"].max()
-        date_range = st.date_input("📅 Select Date Range:", [min_date, max_date])
-
-    #Apply Filters to City
-    filtered_df = df.copy()
-    if selected_city != "All":
-        filtered_df = filtered_df[filtered_df["City"] == selected_city]
-
-    #Apply Filters to Categories
-    if selected_category != "All":
-        filtered_df = filtered_df[filtered_df["category"] == selected_category]
-
-    # Filter to date range
-    filtered_df = filtered_df[
-        (filtered_df["date"] >= pd.to_datetime(date_range[0])) & (filtered_df["date"] <= pd.to_datetime(date_range[1]))]
-
-    st.markdown("### 🧮 Key Metrics")
-
-
-    kpi1, kpi2, kpi3 = st.columns(3)
-    kpi1.metric("Total Revenue", f"${filtered_df['Revenue'].sum():,.2f}")
-    kpi2.metric("Total Profit", f"${filtered_df['Profit'].sum():,.2f}")
-    kpi3.metric("Average Rating", f"{filtered_df['rating'].mean():.2f} ⭐")
-
-    with st.expander("📊 Explore Sales Overview Charts"):
-        col1, col2 = st.columns(2)
-        with col1:
-            # 📊 **Revenue Trend Over Time**
-            revenue_by_year = (filtered_df.dropna(subset=["date"]).groupby(filtered_df["date"].dt.year)["Revenue"].sum().reset_index(name="Revenue"))
-            fig1 = px.line(revenue_by_year, x="date", y="Revenue", markers=True,
-                            title="📊 Revenue Trends Over Time", color_discrete_sequence=["#1f77b4"])
-            st.plotly_chart(fig1, use_container_width=True)
+                engine = load_filter_index(load_sales_data(SECTION_COLUMNS[selected]))
+            stage["rows"] = engine.count()
+
+    # 📌 **Register Page**
+    if selected == "Register":
+        st.header("📝 Create an Account")
+        reg_email = st.text_input("📧Enter Your Email").strip()
+        reg_password = st.text_input("🔒Enter Your Password", type="password").strip()
+        register_button = st.button("Register")
+
+        if register_button:
+            if reg_email and reg_password:
+                if user_store.exists(reg_email) or not user_store.register(reg_email, reg_password):
+                    st.error("⚠️ Email Already Exists. Please Login")
+                else:
+                    st.success("✅ Registration Successful! You can now log in.")
+            else:
+                st.error("Please enter both email and password")
+
+    # 🔓 **Login Page**
+    if selected == "Login":
+        st.header("🔓 Login to Dashboard")
+        email = st.text_input("📧Enter Your Email").strip()
+        password = st.text_input("🔒Enter Your Password", type="password").strip()
+        login_button = st.button("Login")
+
+        if login_button:
+            email = str(email).strip()
+            password = str(password).strip()
+
+            if user_store.authenticate(email, password):
+                st.session_state.authenticated = True
+                st.session_state.user_id = email
+                st.success("✅ Login Successful! Redirecting to Welcome Page...")
+                st.rerun()  # Refresh page after login
+            else:
+                st.error("❌ Invalid email or password")
 
+    # 🏠 **Welcome Page After Login**
+    if selected == "Welcome" and st.session_state.authenticated:
+        st.markdown(
+            """
+            <style>
+            .welcome-header {
+                font-size: 36px;
+                font-weight: bold;
+                text-align: center;
+                background: linear-gradient(to right, #ff6a00, #ee0979);
+                -webkit-background-clip: text;
+                -webkit-text-fill-color: transparent;
+            }
+            .sub-header {
+                font-size: 24px;
+                font-weight: bold;
+                text-align: center;
+                color: #444;
+            }
+            </style>
+            """,
+            unsafe_allow_html=True
+        )
+        st.markdown(f'<h1 class="welcome-header">🎉 Welcome to 🛒 <br>'
+                    f'Intelligent Sales Analytics Dashboard </h1>', unsafe_allow_html=True)
+        st.markdown('<h5 class="sub-header">Explore dynamic sales trends, customer behavior, and performance insights.<br>'
+                    'Use the sidebar to navigate and discover deep analytics through interactive visualizations.</h5>',
+                    unsafe_allow_html=True)
 
-        with col2:
-            # 📌 **Sales Distribution by Category**
-            revenue_by_category = filtered_df.groupby("category")["Revenue"].sum().reset_index()
-            fig2 = px.pie(revenue_by_category, names="category", values="Revenue",
-                            title="📌 Revenue Distribution by Category", hole=0.4)
-            st.plotly_chart(fig2, use_container_width=True)
+        # Info Message in a Styled Container
+        # st.header("🎉 Welcome to Sales Analytics Dashboard")
+        # st.subheader(f"Hello, {st.session_state.user_id} 👋")
+        st.info("✅ You are now logged in and can explore the dashboard. Use the sidebar to navigate different sections of the dashboard.")
 
+    # -----------------------------------------------------------------------------------------------------------------------#
 
-        # 💰 **Revenue Distribution Histogram**
-        st.subheader("💰 Revenue Distribution")
-        fig3 = px.histogram(filtered_df, x="Revenue", nbins=20,
-                            title="📊 Revenue Distribution Across Orders",
-                            color_discrete_sequence=["#0077B6"], opacity=0.8)
-        fig3.update_layout(xaxis_title="Revenue ($)", yaxis_title="Frequency", template="plotly_dark")
-        st.plotly_chart(fig3, use_container_width=True)
+    if selected == "Sales Overview":
+        st.header("Overview of Walmart Sales Analytics Dashboard!")
+
+        col1, col2, col3 = st.columns(3)
+        # 🔍 **Filter: Select Region**
+        with col1:
+            selected_city = st.selectbox("🌍 Select City:", options=["All"] + engine.values("City"), index=0)
 
+        with col2:
+            selected_category = st.selectbox(" Select Category", options=["All"] + engine.values("category"), index=0)
+
+        # 📅 **Filter to Select Date Range**
+        with col3:
+            min_date, max_date = engine.date_bounds()
+            date_range = st.date_input("📅 Select Date Range:", [min_date, max_date])
+            # The widget returns a single date while the user is still picking the range
+            start_date, end_date = date_range[0], date_range[-1]
+
+        # Filters to City, Categories and date range, for the rollup cube and the row-level histogram
+        filters = dict(start=start_date, end=end_date, City=selected_city, category=selected_category)
+
+        def sales_overview_results():
+            filtered_cube = filter_cube(cube, **filters)
+            # Date-only selections come straight from the per-day running totals
+            if is_selected(selected_city) or is_selected(selected_category):
+                metrics = kpis(filtered_cube)
+            else:
+                metrics = engine.kpis(start_date, end_date)
+            return {
+                "metrics": metrics,
+                "revenue_by_category": rollup(filtered_cube, "category", "Revenue"),
+                "revenue_counts": engine.histogram("Revenue", nbins=20, **filters),
+            }
+
+        # KPIs and chart frames for this selection, shared across reruns and sessions
+        results = cached_query("Sales Overview", filters, sales_overview_results)
+        metrics = results["metrics"]
 
-# -----------------------------------------------------------------------------------------------------------------------#
+        st.markdown("### 🧮 Key Metrics")
 
-if selected == "Customer Insights":
-        st.title("👥Customer Behavior")
-        st.write("This Section helps to analyze customer satisfaction and buying patterns using filters like city and payment method — useful for CMO of company, marketing and CX teams.")
+        kpi1, kpi2, kpi3 = st.columns(3)
+        kpi1.metric("Total Revenue", f"${metrics['Revenue']:,.2f}")
+        kpi2.metric("Total Profit", f"${metrics['Profit']:,.2f}")
+        kpi3.metric("Average Rating", f"{metrics['rating']:.2f} ⭐")
 
-        with st.expander("🧠 Dive into Customer Insights"):
+        with st.expander("📊 Explore Sales Overview Charts"):
             col1, col2 = st.columns(2)
-            # 🔍 **Filter: Select Region**
             with col1:
-                selected_city = st.selectbox("🌍 Select City:", options=["All"] + sorted(df["City"].unique()), index=0)
+                # 📊 **Revenue Trend Over Time**
+                granularity = st.selectbox("Trend granularity:", GRANULARITIES, index=GRANULARITIES.index("year"))
+                # Only this selection's series is aggregated, from the precomputed time bucket keys
+                revenue_trend = cached_query("Sales Overview trend", dict(filters, granularity=granularity),
+                                             lambda: engine.trend("Revenue", granularity, **filters))
+                fig1 = charts.revenue_trend(revenue_trend)
+                trace.plotly_chart(fig1, use_container_width=True)
+
 
             with col2:
-                selected_payment = st.selectbox("💳Select Payment", options=["All"] + sorted(df["payment_method"].unique()),
-                                                 index=0)
+                # 📌 **Sales Distribution by Category**
+                fig2 = charts.revenue_by_category_pie(results["revenue_by_category"])
+                trace.plotly_chart(fig2, use_container_width=True)
 
-            # Apply Filters to City
-            filtered_df = df.copy()
-            if selected_city != "All":
-                filtered_df = filtered_df[filtered_df["City"] == selected_city]
 
-            # Apply Filters to Categories
-            if selected_payment != "All":
-                filtered_df = filtered_df[filtered_df["payment_method"] == selected_payment]
+            # 💰 **Revenue Distribution Histogram**
+            st.subheader("💰 Revenue Distribution")
+            fig3 = charts.revenue_histogram(results["revenue_counts"])
+            trace.plotly_chart(fig3, use_container_width=True)
 
-            st.markdown(f"### Insights for City: `{selected_city}` | Payment Method: `{selected_payment}`")
 
-            col1, col2 = st.columns(2)
-            with col1:
-                # --- Chart 4: Customer Rating Distribution ---
-                fig4 = px.histogram(filtered_df, x="rating", nbins=20, color="payment_method",
-                                            title="Customer Ratings Distribution (Filtered)")
-                st.plotly_chart(fig4, use_container_width=True)
-            with col2:
-                # --- Chart 5: Revenue by Payment Method ---
-                fig5 = px.pie(filtered_df, names="payment_method", values="Revenue",
-                                title="Revenue Share by Payment Method")
-                st.plotly_chart(fig5, use_container_width=True )
-
-            # --- Chart 3: Area Chart of Customer Rating Distribution ---
-            # filtered_df_sorted = filtered_df.sort_values(by="rating")
-            # filtered_df_sorted["Index"] = range(len(filtered_df_sorted))  # x-axis
-            #
-            # fig6 = px.area(filtered_df_sorted,x="Index", y="rating", color="City",
-            #     title="Customer Ratings Distribution (Filtered Area Chart)")
-            # st.plotly_chart(fig6,use_container_width=True )
+    # -----------------------------------------------------------------------------------------------------------------------#
 
-            # --- Chart 6: Average Rating by City ---
-            top_15_cities = (df.groupby("City")["Revenue"].mean().sort_values(ascending=False).head(15).reset_index())
+    if selected == "Customer Insights":
+            st.title("👥Customer Behavior")
+            st.write("This Section helps to analyze customer satisfaction and buying patterns using filters like city and payment method — useful for CMO of company, marketing and CX teams.")
 
-            fig6 = px.bar(top_15_cities, x="City", y="Revenue", color="City",
-                             title="Top 15 Cities By Revenue",  text_auto='.2s')
-            fig6.update_layout(showlegend=False)
-            st.plotly_chart(fig6, use_container_width=True)
+            with st.expander("🧠 Dive into Customer Insights"):
+                col1, col2 = st.columns(2)
+                # 🔍 **Filter: Select Region**
+                with col1:
+                    selected_city = st.selectbox("🌍 Select City:", options=["All"] + engine.values("City"), index=0)
 
+                with col2:
+                    selected_payment = st.selectbox("💳Select Payment", options=["All"] + engine.values("payment_method"),
+                                                     index=0)
 
-# -----------------------------------------------------------------------------------------------------------------------
+                # Apply Filters to City and Payment Method
+                filters = dict(City=selected_city, payment_method=selected_payment)
 
-if selected == "Product Performance":
-    st.header("Product Performance")
-    st.write("This Section Identifies which products/categories are driving sales and profit — key for inventory and pricing decisions.")
+                def customer_insights_results():
+                    return {
+                        "rating_counts": engine.histogram("rating", nbins=20, color="payment_method", **filters),
+                        "revenue_by_payment": rollup(filter_cube(cube, **filters), "payment_method", "Revenue"),
+                    }
 
-    with st.expander("📦 Product Performance Analyticss"):
-        # 🔍 **Filter: Select Category**
-        selected_category = st.selectbox("Select category:", options=["All"] + sorted(df["category"].unique()), index=0)
+                results = cached_query("Customer Insights", filters, customer_insights_results)
 
-        # st.markdown(f"### Product Performance for Category `{selected_category}`")
+                st.markdown(f"### Insights for City: `{selected_city}` | Payment Method: `{selected_payment}`")
 
-        # --- Chart 7: Avg Profit by Category Over Time ---
-        df["date"] = pd.to_datetime(df["date"], dayfirst=True)
-        profit_trend = (df.groupby([df["date"].dt.to_period("M").astype(str), "category"])["Profit"].mean().reset_index()
-            .rename(columns={"date": "Month"})
-        )
+                col1, col2 = st.columns(2)
+                with col1:
+                    # --- Chart 4: Customer Rating Distribution ---
+                    fig4 = charts.rating_histogram_by_payment(results["rating_counts"])
+                    trace.plotly_chart(fig4, use_container_width=True)
+                with col2:
+                    # --- Chart 5: Revenue by Payment Method ---
+                    fig5 = charts.revenue_by_payment_pie(results["revenue_by_payment"])
+                    trace.plotly_chart(fig5, use_container_width=True)
 
-        fig7 = px.line(
-            profit_trend[profit_trend["category"] == selected_category],
-            x="Month", y="Profit", title="Avg Profit Over Time by Category",
-            markers=True
-        )
-        st.plotly_chart(fig7, use_container_width=True)
+                # --- Chart 3: Area Chart of Customer Rating Distribution ---
+                # filtered_df_sorted = filtered_df.sort_values(by="rating")
+                # filtered_df_sorted["Index"] = range(len(filtered_df_sorted))  # x-axis
+                #
+                # fig6 = px.area(filtered_df_sorted,x="Index", y="rating", color="City",
+                #     title="Customer Ratings Distribution (Filtered Area Chart)")
+                # st.plotly_chart(fig6,use_container_width=True )
 
-        col1, col2 = st.columns(2)
-        with col1:
-            # --- Chart 8: Donut Chart - Profit Share by Category ---
-            quantity_sold = df.groupby("category")["quantity"].sum().reset_index()
-
-            fig8 = px.pie(quantity_sold,names="category", values="quantity", hole=0.5,
-                title="Distribution of Quantity sold in Product Category")
-            fig8.update_layout(showlegend=False)
-            st.plotly_chart(fig8, use_container_width=True)
-
-        # --- Chart 9: Line Chart - Average Unit Price Over Time by Category ---
-        # quantity_sold = (
-        #     filtered_df.groupby(["date", "category"])["quantity"]
-        #     .mean()
-        #     .reset_index()
+                # --- Chart 6: Average Rating by City ---
+                with trace.stage("aggregate"):
+                    revenue_by_city = rollup(cube, "City", "Revenue", "mean")
+                fig6 = charts.top_cities_by_revenue(revenue_by_city)
+                trace.plotly_chart(fig6, use_container_width=True)
+
+
+    # -----------------------------------------------------------------------------------------------------------------------
+
+    if selected == "Product Performance":
+        st.header("Product Performance")
+        st.write("This Section Identifies which products/categories are driving sales and profit — key for inventory and pricing decisions.")
+
+        with st.expander("📦 Product Performance Analyticss"):
+            # 🔍 **Filter: Select Category**
+            selected_category = st.selectbox("Select category:", options=["All"] + engine.values("category"), index=0)
+
+            # st.markdown(f"### Product Performance for Category `{selected_category}`")
+
+            granularity = st.selectbox("Trend granularity:", GRANULARITIES, index=GRANULARITIES.index("month"))
+
+            # --- Chart 7: Avg Profit by Category Over Time ---
+            profit_trend = cached_query("Product Performance trend",
+                                        dict(category=selected_category, granularity=granularity),
+                                        lambda: engine.trend("Profit", granularity, "mean", category=selected_category))
+
+            fig7 = charts.profit_trend(profit_trend)
+            trace.plotly_chart(fig7, use_container_width=True)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                # --- Chart 8: Donut Chart - Profit Share by Category ---
+                with trace.stage("aggregate"):
+                    quantity_sold = rollup(cube, "category", "quantity")
+
+                fig8 = charts.quantity_by_category_pie(quantity_sold)
+                trace.plotly_chart(fig8, use_container_width=True)
+
+            # --- Chart 9: Line Chart - Average Unit Price Over Time by Category ---
+            # quantity_sold = (
+            #     filtered_df.groupby(["date", "category"])["quantity"]
+            #     .mean()
+            #     .reset_index()
+            # )
+            #
+            # fig9 = px.line(
+            #     quantity_sold,
+            #     x="date", y="quantity", color="category",
+            #     title="Quantity Sold Over Time in Category"
+            # )
+            # st.plotly_chart(fig9, use_container_width=True)
+
+            with col2:
+                # --- Chart 9: Total Revenue by Product Category ---
+                with trace.stage("aggregate"):
+                    revenue_by_category = rollup(cube, "category", "Revenue")
+                fig9 = charts.revenue_by_category_bar(revenue_by_category)
+                trace.plotly_chart(fig9, use_container_width=True)
+
+            #plot tree map
+            fig10 = charts.category_treemap(quantity_sold)
+            trace.plotly_chart(fig10, use_container_width=True)
+
+    #-----------------------------------------------------------------------------------------------------------------------
+
+    if selected == "Branch Performance":
+
+        # --- Branch Search ---
+        st.header("🔍 Search Branch to get Insights!!")
+        branch_query = st.text_input("Enter Branch Code (e.g., WALM001, WALM067):")
+
+        # Trigram index over the branch codes with per-branch KPI totals
+        with trace.stage("load"):
+            branch_search = load_branch_search(cube)
+
+        if branch_query:
+            with trace.stage("filter"):
+                matched_branches = branch_search.find(branch_query)
+
+            if matched_branches:
+                if len(matched_branches) > 1:
+                    suggestions = branch_search.suggest(branch_query)
+                    st.caption("Matching branches: " + ", ".join(suggestions) +
+                               (" ..." if len(matched_branches) > len(suggestions) else ""))
+
+                with trace.stage("aggregate"):
+                    branch_kpis = branch_search.kpis(matched_branches)
+                st.markdown(f"### 🧮 Key Metrics of  `{branch_query}` :")
+                kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+                kpi1.metric("Total Revenue", f"${branch_kpis['Revenue']:,.2f}")
+                kpi2.metric("Total Profit", f"${branch_kpis['Profit']:,.2f}💰")
+                kpi3.metric("Total Quantity Sold", f"{branch_kpis['quantity']:,.2f}")
+                kpi4.metric("Average Rating", f"{branch_kpis['rating']:.2f} ⭐")
+
+                # Only a preview of the matching transactions is sent to the browser
+                with trace.stage("filter") as stage:
+                    preview = engine.page(0, BRANCH_PREVIEW_ROWS, Branch=matched_branches)
+                    n_matches = engine.count(Branch=matched_branches)
+                    stage["rows"] = n_matches
+                trace.dataframe(preview, "branch preview")
+                if n_matches > BRANCH_PREVIEW_ROWS:
+                    st.caption(f"Showing the first {BRANCH_PREVIEW_ROWS:,} of {n_matches:,} transactions")
+            else:
+                st.warning(f"No data found for Branch Code: {branch_query}")
+                close_codes = branch_search.similar(branch_query)
+                if close_codes:
+                    st.caption("Did you mean: " + ", ".join(close_codes))
+
+        # --- Chart 1: Average Profit per Transaction by Branch ---
+        with trace.stage("aggregate"):
+            branch_profit = rollup(cube, "Branch", "Profit")
+            rating_counts = engine.histogram("rating", nbins=20)
+
+        fig11 = charts.top_branches_by_profit(branch_profit)
+        trace.plotly_chart(fig11, use_container_width=True)
+
+        # 💰 **Revenue Distribution Histogram**
+        st.subheader("💰 Rating Distribution over Branches")
+        fig12 = charts.rating_histogram(rating_counts)
+        trace.plotly_chart(fig12, use_container_width=True)
+
+
+        # # Group by Branch and calculate total Revenue and Profit
+        # branch_performance = df.groupby("Branch")[["Revenue", "Profit"]].sum().reset_index()
+        #
+        # # Sort by Revenue and pick top 10 branches
+        # top10_branch_performance = branch_performance.sort_values(by="Revenue", ascending=False).head(10)
+        #
+        # # Create a vertical grouped bar chart
+        # fig12 = px.bar(
+        #     top10_branch_performance,
+        #     x="Branch",
+        #     y=["Revenue", "Profit"],
+        #     barmode='group',  # Group bars side-by-side
+        #     title="Top 10 Branches: Total Revenue vs Profit",
+        #     labels={"value": "Amount", "variable": "Metric"},
+        #     color_discrete_sequence=["#636EFA", "#EF553B"]  # Custom colors for Revenue and Profit
         # )
         #
-        # fig9 = px.line(
-        #     quantity_sold,
-        #     x="date", y="quantity", color="category",
-        #     title="Quantity Sold Over Time in Category"
+        # # Beautify layout
+        # fig12.update_layout(
+        #     xaxis_title="Branch",
+        #     yaxis_title="Amount (Revenue / Profit)",
+        #     legend_title="Metric",
+        #     template="plotly_white"
         # )
-        # st.plotly_chart(fig9, use_container_width=True)
+        #
+        # # Display the chart
+        # st.plotly_chart(fig12, use_container_width=True)
 
-        with col2:
-            # --- Chart 9: Total Revenue by Product Category ---
-            revenue_by_category = (df.groupby("category")["Revenue"].sum().sort_values(ascending=False).reset_index())
-
-            fig9 = px.bar(revenue_by_category,x="Revenue", y="category", color="category",
-                                title="Total Revenue by Product Category",  text_auto='.2s' )
-            fig9.update_layout(
-                showlegend=False,
-                xaxis_title="Total Revenue",
-                yaxis_title="Product Category",
-                template="plotly_white"
-            )
-            st.plotly_chart(fig9, use_container_width=True)
-
-        #plot tree map
-        fig10 = px.treemap(df, path=["category"], values="quantity", title="📌 Sales Breakdown by Category")
-        st.plotly_chart(fig10, use_container_width=True)
-
-#-----------------------------------------------------------------------------------------------------------------------
-
-if selected == "Branch Performance":
-
-    # --- Branch Search ---
-    st.header("🔍 Search Branch to get Insights!!")
-    branch_query = st.text_input("Enter Branch Code (e.g., WALM001, WALM067):")
-
-    if branch_query:
-        result_df = df[df["Branch"].str.contains(branch_query, case=False, na=False)]
-
-        if not result_df.empty:
-            st.markdown(f"### 🧮 Key Metrics of  `{branch_query}` :")
-            kpi1, kpi2, kpi3, kpi4 = st.columns(4)
-            kpi1.metric("Total Revenue", f"${result_df['Revenue'].sum():,.2f}")
-            kpi2.metric("Total Profit", f"${result_df['Profit'].sum():,.2f}💰")
-            kpi3.metric("Total Quantity Sold", f"{result_df['quantity'].sum():,.2f}")
-            kpi4.metric("Average Rating", f"{result_df['rating'].mean():.2f} ⭐")
-
-            st.dataframe(result_df)
-        else:
-            st.warning(f"No data found for Branch Code: {branch_query}")
-
-    # --- Chart 1: Average Profit per Transaction by Branch ---
-    branch_profit = df.groupby("Branch")["Profit"].sum().reset_index()
-
-    top_branches = branch_profit.sort_values(by="Profit", ascending=False).head(15)
-
-    fig11 = px.bar(
-        top_branches,
-        x="Branch",
-        y="Profit",
-        color="Branch",
-        title="Top 15 Most Profitable Branches",
-        text_auto='.2s'  # shows numbers on top of bars, auto formatted
-    )
-
-    fig11.update_layout(
-        xaxis_title="Branch",
-        yaxis_title="Total Profit",
-        showlegend=False,
-    )
-    st.plotly_chart(fig11, use_container_width=True)
-
-    # 💰 **Revenue Distribution Histogram**
-    st.subheader("💰 Rating Distribution over Branches")
-    fig12 = px.histogram(df, x="rating", nbins=20,
-                        title="📊 Rating Distribution Across Branches")
-    fig12.update_layout(xaxis_title="Ratings", yaxis_title="Frequency")
-    st.plotly_chart(fig12, use_container_width=True)
-
-
-    # # Group by Branch and calculate total Revenue and Profit
-    # branch_performance = df.groupby("Branch")[["Revenue", "Profit"]].sum().reset_index()
-    #
-    # # Sort by Revenue and pick top 10 branches
-    # top10_branch_performance = branch_performance.sort_values(by="Revenue", ascending=False).head(10)
-    #
-    # # Create a vertical grouped bar chart
-    # fig12 = px.bar(
-    #     top10_branch_performance,
-    #     x="Branch",
-    #     y=["Revenue", "Profit"],
-    #     barmode='group',  # Group bars side-by-side
-    #     title="Top 10 Branches: Total Revenue vs Profit",
-    #     labels={"value": "Amount", "variable": "Metric"},
-    #     color_discrete_sequence=["#636EFA", "#EF553B"]  # Custom colors for Revenue and Profit
-    # )
-    #
-    # # Beautify layout
-    # fig12.update_layout(
-    #     xaxis_title="Branch",
-    #     yaxis_title="Amount (Revenue / Profit)",
-    #     legend_title="Metric",
-    #     template="plotly_white"
-    # )
-    #
-    # # Display the chart
-    # st.plotly_chart(fig12, use_container_width=True)
-
-#-----------------------------------------------------------------------------------------------------------------------
-
-if selected == "Dataset":
-
-    # Section 6: Dataset Display
-    st.header("📊 Dataset Explorer")
-    st.markdown("### 🗂️ Full Dataset Viewer")
-
-    # --- Expandable Summary ---
-    with st.expander("📈 View Summary Statistics"):
-        st.dataframe(df.describe())
-
-    # --- Simple Filters ---
-    st.markdown("### 🔍 Filter Dataset")
-    col1, col2 = st.columns(2)
-
-    with col1:
-        filter_category = st.selectbox(
-            "Filter by Category", options=["All"] + sorted(df["category"].unique())
-        )
-    with col2:
-        filter_branch = st.selectbox(
-            "Filter by Branch", options=["All"] + sorted(df["Branch"].unique())
-        )
+    #-----------------------------------------------------------------------------------------------------------------------
 
-    # --- Apply Filters ---
-    filtered_data = df.copy()
-    if filter_category != "All":
-        filtered_data = filtered_data[filtered_data["category"] == filter_category]
-    if filter_branch != "All":
-        filtered_data = filtered_data[filtered_data["Branch"] == filter_branch]
+    if selected == "Dataset":
 
-    # --- Display Filtered Data ---
-    st.markdown(f"### 🧾 Showing {len(filtered_data)} Records")
-    st.dataframe(filtered_data)
+        # Section 6: Dataset Display
+        st.header("📊 Dataset Explorer")
+        st.markdown("### 🗂️ Full Dataset Viewer")
 
+        # --- Expandable Summary (filled in once the filters are known) ---
+        summary_expander = st.expander("📈 View Summary Statistics")
 
-#-----------------------------------------------------------------------------------------------------------------------
+        # --- Simple Filters ---
+        st.markdown("### 🔍 Filter Dataset")
+        col1, col2 = st.columns(2)
 
-if selected == "Key Insights":
-    st.header("🔍 Key Business Insights")
+        with col1:
+            filter_category = st.selectbox(
+                "Filter by Category", options=["All"] + engine.values("category")
+            )
+        with col2:
+            filter_branch = st.selectbox(
+                "Filter by Branch", options=["All"] + engine.values("Branch")
+            )
 
-    with st.expander("📘 Key Business Insights Summary", expanded=True):
-        insights_md = """
-        ### 🎯 **Key Insights**
+        # --- Apply Filters (the filtered frame is never built, only the visible page) ---
+        filters = dict(category=filter_category, Branch=filter_branch)
+        results = cached_query("Dataset", filters,
+                               lambda: {"n_records": engine.count(**filters), "summary": engine.describe(**filters)})
+        n_records = results["n_records"]
 
-        #### 🏙️ **City-Level Performance**
-        - 🌆 **Top Performing City by Revenue**: `San Antonio`
-        - 🌇 **Most Profitable City**: `San Antonio`, followed by `Harlingen` and `Haltom City`
-        - 🔻 **Least Profitable City**: Cities with lower order volumes like `Bedford` and `Garland`
+        with summary_expander:
+            trace.dataframe(results["summary"], "summary")
 
-        #### 📦 **Product Categories**
-        - 🥇 **Best-Selling Category**: `Health and beauty`
-        - 💰 **Most Profitable Category**: `Electronic accessories` due to high margins
-        - 📉 **Low Performance**: `Sports and travel` has fewer transactions in comparison
+        # --- Display Filtered Data, one page at a time ---
+        st.markdown(f"### 🧾 Showing {n_records} Records")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            page_size = st.selectbox("Rows per page", options=PAGE_SIZES, index=2)
+        with col2:
+            # Sorting needs the in-memory index; out-of-core pages are shown in scan order
+            sort_by = st.selectbox("Sort by", options=["None"] + engine.columns, disabled=not engine.sortable)
+        with col3:
+            sort_order = st.radio("Order", ["Ascending", "Descending"], horizontal=True, disabled=not engine.sortable)
+        with col4:
+            n_pages = max(1, -(-n_records // page_size))
+            page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1)
+
+        with trace.stage("filter", rows=n_records):
+            page_rows = engine.page(page - 1, page_size, sort_by=None if sort_by == "None" else sort_by,
+                                    ascending=sort_order == "Ascending", **filters)
+        trace.dataframe(page_rows, "page")
+
+        # --- Export: files are written chunk by chunk only when a download is clicked ---
+        col1, col2 = st.columns(2)
+        col1.download_button("📥 Download CSV", lambda: engine.export("csv", **filters),
+                             file_name="Wallmart_filtered.csv", mime="text/csv")
+        col2.download_button("📥 Download Parquet", lambda: engine.export("parquet", **filters),
+                             file_name="Wallmart_filtered.parquet", mime="application/octet-stream")
 
-        #### 🧾 **Sales & Revenue Trends**
-        - 📆 **Peak Sales Months**: Mid-year (May to August)
-        - 📈 **Revenue spikes** observed during weekends and evenings
-        - 🕐 **Most Active Hours**: Between 12:00 PM – 3:00 PM
 
-        #### 💳 **Payment Insights**
-        - 💳 **Popular Payment Method**: `Ewallet` (preferred for quick transactions)
-        - 💵 **High-Spending Customers**: Often choose `Credit Card`
-        - 💸 **Low-Spending Range**: More common with `Cash` payments
+    #-----------------------------------------------------------------------------------------------------------------------
 
-        #### 🤝 **Customer Behavior**
-        - ⭐ **Average Customer Rating**: 7.3 / 10
-        - 👍 **High Satisfaction**: Majority rated 8 or higher
-        - 📊 **Ratings skew positively** across all cities and payment types
+    if selected == "Key Insights":
+        st.header("🔍 Key Business Insights")
 
-        #### 💹 **Profitability**
-        - 💎 **High Profit Margin Products**: Often belong to `Home and lifestyle`
-        - 🔍 **Low Margins**: Seen in bulk quantity orders, especially with `Sports and travel`
-        """
+        with st.expander("📘 Key Business Insights Summary", expanded=True):
+            # Findings computed from the data once per data version
+            with trace.stage("aggregate"):
+                insights_md = load_insights()
 
-        st.markdown(insights_md)
+            st.markdown(insights_md)
 
-        st.download_button("📥 Download Key Insights", insights_md, file_name="Walmart_Key_Insights.md")
+            st.download_button("📥 Download Key Insights", insights_md, file_name="Walmart_Key_Insights.md")
 
 
-#-----------------------------------------------------------------------------------------------------------------------
+    #-----------------------------------------------------------------------------------------------------------------------
 
 
-if selected == "Logout":
-    st.session_state.authenticated = False
-    st.session_state.user_id = None
-    st.query_params.clear()
+    if selected == "Logout":
+        st.session_state.authenticated = False
+        st.session_state.user_id = None
+        st.query_params.clear()
 
-    st.markdown("## 👋 Thank You for Visiting!")
-    st.markdown("We hope you found the insights valuable and actionable.")
+        st.markdown("## 👋 Thank You for Visiting!")
+        st.markdown("We hope you found the insights valuable and actionable.")
 
-    st.image("https://media.giphy.com/media/v1.Y2lkPTc5MGI3NjExY3RkdTQ4OWs3NHM1OTd2NDEyenZ2c2J0NXR4aTF4d2xseWcwZ2QxMyZlcD12MV9naWZzX3NlYXJjaCZjdD1n/jUwpNzg9IcyrK/giphy.gif", width=300)
+        st.image("https://media.giphy.com/media/v1.Y2lkPTc5MGI3NjExY3RkdTQ4OWs3NHM1OTd2NDEyenZ2c2J0NXR4aTF4d2xseWcwZ2QxMyZlcD12MV9naWZzX3NlYXJjaCZjdD1n/jUwpNzg9IcyrK/giphy.gif", width=300)
 
-    st.success("✅ Session Completed. You're safe to log out.")
+        st.success("✅ Session Completed. You're safe to log out.")
 
-    # --- Optional Logout Confirmation Button ---
-    if st.button("🔒 Logout Now"):
-        st.warning("You have logged out successfully.")
-        st.stop()
+        # --- Optional Logout Confirmation Button ---
+        if st.button("🔒 Logout Now"):
+            st.warning("You have logged out successfully.")
+            st.stop()
+finally:
+    # Also runs when st.rerun() or st.stop() ends the script early
+    trace.finish()
+if is_admin(st.session_state.user_id):
+    from query_cache import get_query_cache
+    admin_panel(trace, get_query_cache().stats())
 
 # ---- HIDE STREAMLIT STYLE ----
 hide_st_style = """
@@ -0,0 +1,103 @@
+import difflib
+from collections import Counter, defaultdict
+
+import pandas as pd
+import streamlit as st
+
+from data_loader import data_source
+from rollup import rollup
+
+
+# Transactions shown under a branch search result
+BRANCH_PREVIEW_ROWS = 500
+# Lowest similarity (difflib ratio) for a code to be offered as a correction of a mistyped query
+SIMILARITY_CUTOFF = 0.6
+# Codes sharing the most trigrams with a mistyped query that are compared with it
+SIMILAR_CANDIDATES = 50
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class BranchSearch:
+    """Case-insensitive substring search over the distinct Branch codes.
+
+    Codes are indexed by their trigrams, so a query only checks the codes sharing all
+    of its trigrams. Per-branch KPI sums are taken from the rollup cube up front, and
+    the matching rows come from the FilterIndex, so a search never scans transactions.
+    """
+
+    def __init__(self, cube):
+        self.kpi_table = self._branch_kpis(cube)
+        self.codes = sorted(self.kpi_table.index)
+        self._lower = [code.lower() for code in self.codes]
+        self._by_lower = dict(zip(self._lower, self.codes))
+
+        self._trigram_index = defaultdict(set)
+        for i, code in enumerate(self._lower):
+            for gram in _trigrams(code):
+                self._trigram_index[gram].add(i)
+
+    @staticmethod
+    def _branch_kpis(cube):
+        parts = [rollup(cube, "Branch", m).set_index("Branch")[m] for m in ("Revenue", "Profit", "quantity")]
+        parts += [rollup(cube, "Branch", "rating").set_index("Branch")["rating"].rename("rating_sum"),
+                  rollup(cube, "Branch", "rating", "count").set_index("Branch")["rating"].rename("rating_count")]
+        table = pd.concat(parts, axis=1)
+        table.index = table.index.astype(str)
+        return table
+
+    def find(self, query):
+        """Branch codes containing `query`, prefix matches first."""
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        if len(query) >= 3:
+            grams = sorted(_trigrams(query), key=lambda g: len(self._trigram_index.get(g, ())))
+            candidates = set(self._trigram_index.get(grams[0], ()))
+            for gram in grams[1:]:
+                candidates &= self._trigram_index.get(gram, set())
+        else:
+            candidates = range(len(self.codes))
+
+        hits = [i for i in candidates if query in self._lower[i]]
+        hits.sort(key=lambda i: (not self._lower[i].startswith(query), self._lower[i]))
+        return [self.codes[i] for i in hits]
+
+    def suggest(self, query, limit=8):
+        """Autocomplete suggestions for a partially typed branch code."""
+        return self.find(query)[:limit]
+
+    def similar(self, query, limit=5):
+        """Codes closest to a query that matches nothing (a typo such as "wlam003"), best first.
+
+        Only the codes sharing the most trigrams with the query are compared with it.
+        """
+        query = query.strip().lower()
+        shared = Counter()
+        for gram in _trigrams(query):
+            shared.update(self._trigram_index.get(gram, ()))
+        pool = [self._lower[i] for i, _ in shared.most_common(SIMILAR_CANDIDATES)]
+        return [self._by_lower[code] for code in difflib.get_close_matches(query, pool, limit, SIMILARITY_CUTOFF)]
+
+    def kpis(self, branches):
+        """Total Revenue/Profit/quantity and mean rating over the given branches."""
+        sums = self.kpi_table.loc[list(branches)].sum()
+        return {
+            "Revenue": sums["Revenue"],
+            "Profit": sums["Profit"],
+            "quantity": sums["quantity"],
+            "rating": sums["rating_sum"] / sums["rating_count"] if sums["rating_count"] else float("nan"),
+        }
+
+
+@st.cache_resource(max_entries=2)
+def _load_branch_search(path, version, _cube):
+    return BranchSearch(_cube)
+
+
+def load_branch_search(cube):
+    """Return the BranchSearch for the current dataset, built once per data version."""
+    return _load_branch_search(*data_source(), cube)
@@ -0,0 +1,93 @@
+import plotly.express as px
+
+import figures
+
+
+# Figure builders for every dashboard chart, shared by the pages and report.py. Each takes
+# the aggregated frame the dashboard computes (rollup, trend or histogram counts).
+
+
+def revenue_trend(trend):
+    # Chart 1: Revenue Trend Over Time
+    return figures.line(trend, x="period", y="Revenue", markers=True,
+                        title="📊 Revenue Trends Over Time", color_discrete_sequence=["#1f77b4"])
+
+
+def revenue_by_category_pie(revenue_by_category):
+    # Chart 2: Sales Distribution by Category
+    return px.pie(revenue_by_category, names="category", values="Revenue",
+                  title="📌 Revenue Distribution by Category", hole=0.4)
+
+
+def revenue_histogram(counts):
+    # Chart 3: Revenue Distribution Histogram
+    fig = figures.histogram_figure(counts, x="Revenue", title="📊 Revenue Distribution Across Orders",
+                                   color_discrete_sequence=["#0077B6"], opacity=0.8)
+    fig.update_layout(xaxis_title="Revenue ($)", yaxis_title="Frequency", template="plotly_dark")
+    return fig
+
+
+def rating_histogram_by_payment(counts):
+    # Chart 4: Customer Rating Distribution
+    return figures.histogram_figure(counts, x="rating", color="payment_method",
+                                    title="Customer Ratings Distribution (Filtered)")
+
+
+def revenue_by_payment_pie(revenue_by_payment):
+    # Chart 5: Revenue by Payment Method
+    return px.pie(revenue_by_payment, names="payment_method", values="Revenue",
+                  title="Revenue Share by Payment Method")
+
+
+def top_cities_by_revenue(revenue_by_city):
+    # Chart 6: Average Revenue by City, top 15
+    top_15_cities = revenue_by_city.sort_values("Revenue", ascending=False).head(15)
+    fig = px.bar(top_15_cities, x="City", y="Revenue", color="City",
+                 title="Top 15 Cities By Revenue", text_auto='.2s')
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def profit_trend(trend):
+    # Chart 7: Avg Profit by Category Over Time
+    return figures.line(trend.rename(columns={"period": "Period"}), x="Period", y="Profit",
+                        title="Avg Profit Over Time by Category", markers=True)
+
+
+def quantity_by_category_pie(quantity_sold):
+    # Chart 8: Donut Chart - Quantity Share by Category
+    fig = px.pie(quantity_sold, names="category", values="quantity", hole=0.5,
+                 title="Distribution of Quantity sold in Product Category")
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def revenue_by_category_bar(revenue_by_category):
+    # Chart 9: Total Revenue by Product Category
+    fig = px.bar(revenue_by_category.sort_values("Revenue", ascending=False), x="Revenue", y="category",
+                 color="category", title="Total Revenue by Product Category", text_auto='.2s')
+    fig.update_layout(showlegend=False, xaxis_title="Total Revenue", yaxis_title="Product Category",
+                      template="plotly_white")
+    return fig
+
+
+def category_treemap(quantity_sold):
+    # Chart 10: Tree map of quantity sold per category
+    return px.treemap(quantity_sold, path=["category"], values="quantity", title="📌 Sales Breakdown by Category")
+
+
+def top_branches_by_profit(branch_profit):
+    # Chart 11: Top 15 Most Profitable Branches
+    top_branches = branch_profit.sort_values(by="Profit", ascending=False).head(15)
+    fig = px.bar(top_branches, x="Branch", y="Profit", color="Branch",
+                 title="Top 15 Most Profitable Branches",
+                 text_auto='.2s')  # shows numbers on top of bars, auto formatted
+    fig.update_layout(xaxis_title="Branch", yaxis_title="Total Profit", showlegend=False)
+    return fig
+
+
+def rating_histogram(counts):
+    # Chart 12: Rating Distribution over Branches
+    fig = figures.histogram_figure(counts, x="rating", title="📊 Rating Distribution Across Branches")
+    fig.update_layout(xaxis_title="Ratings", yaxis_title="Frequency")
+    return fig
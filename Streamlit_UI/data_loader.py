@@ -0,0 +1,210 @@
+import glob
+import hashlib
+import os
+
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+
+DATA_FILE = "Wallmart.csv"
+# Cleaned, partitioned copy of DATA_FILE written by ingest.py (preferred when present)
+PARQUET_DIR = "Wallmart_parquet"
+# Stream the Parquet dataset in batches instead of loading it (for data larger than RAM)
+OUT_OF_CORE = os.environ.get("SALES_OUT_OF_CORE", "") == "1"
+SCAN_BATCH_ROWS = 256_000
+# Memory-mapped Arrow snapshots of the cleaned data, shared by every session and worker process
+SHARED_DIR = os.environ.get("SALES_CACHE_DIR", ".sales_cache")
+# Written inside the Parquet dataset by ingest.py, and atomically replaced after every change to it
+# (the leading "_" hides them from dataset reads)
+CUBE_FILE = "_rollup.parquet"
+MANIFEST_FILE = "_ingested.json"
+
+# Explicit dtypes so the CSV is parsed straight into compact columns
+CATEGORY_COLUMNS = ["Branch", "City", "category", "payment_method"]
+MONEY_COLUMNS = ["unit_price", "Revenue", "Profit"]
+PARTITION_COLUMNS = ["year", "month", "Branch"]
+
+# Column order of the cleaned dataset
+DATA_COLUMNS = ["invoice_id", "Branch", "City", "category", "unit_price", "quantity", "date", "time",
+                "payment_method", "rating", "profit_margin", "Revenue", "Profit", "datetime"]
+
+CSV_DTYPES = {
+    "invoice_id": "int64",
+    "Branch": "category",
+    "City": "category",
+    "category": "category",
+    "quantity": "float32",
+    "payment_method": "category",
+    "rating": "float32",
+    "profit_margin": "float32",
+}
+
+
+def clean_sales_data(df):
+    """Strip padded headers, parse dates and turn the "$1,234.50 " money strings into float32."""
+    df.columns = df.columns.str.strip()
+
+    for col in MONEY_COLUMNS:
+        if df[col].dtype == object or pd.api.types.is_string_dtype(df[col]):
+            df[col] = df[col].str.replace(r"[\$,\s]", "", regex=True)
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
+
+    # The export mixes 4- and 2-digit years (5/1/2019, 13/03/19); parse both day-first formats
+    raw_date = df["date"]
+    df["date"] = pd.to_datetime(raw_date, format="%d/%m/%Y", errors="coerce")
+    df["date"] = df["date"].fillna(pd.to_datetime(raw_date, format="%d/%m/%y", errors="coerce"))
+    time_of_day = pd.to_datetime(df["time"], format="%I:%M:%S %p", errors="coerce")
+    df["datetime"] = df["date"] + (time_of_day - time_of_day.dt.normalize())
+
+    for col in CATEGORY_COLUMNS:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+
+    return df
+
+
+def sort_by_date(df):
+    """Order rows by date (NaT last) so date ranges are contiguous slices; see filters.DateIndex."""
+    if "date" not in df:
+        return df
+    return df.sort_values("date", kind="stable", na_position="last", ignore_index=True)
+
+
+def source_version(path=DATA_FILE):
+    """Cache key for a data file or Parquet directory: changes whenever it is rewritten.
+
+    A Parquet dataset is versioned by its cube and manifest files, which ingest.py replaces
+    after writing partitions, so no partition file needs to be listed.
+    """
+    if not os.path.isdir(path):
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    version = []
+    for name in (CUBE_FILE, MANIFEST_FILE):
+        try:
+            stat = os.stat(os.path.join(path, name))
+        except FileNotFoundError:
+            continue
+        version.append((name, stat.st_mtime_ns, stat.st_size))
+    if version:
+        return tuple(version)
+
+    # Converted by an ingest.py that did not write a cube yet: every partition file counts
+    latest, files = os.stat(path).st_mtime_ns, 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            latest = max(latest, os.stat(os.path.join(root, name)).st_mtime_ns)
+            files += 1
+    return latest, files
+
+
+def _read_source(path):
+    # Full cleaned dataset from the Parquet directory or the raw CSV
+    if os.path.isdir(path):
+        df = pd.read_parquet(path, columns=DATA_COLUMNS)
+        for col in CATEGORY_COLUMNS:
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype("category")
+    else:
+        df = clean_sales_data(pd.read_csv(path, dtype=CSV_DTYPES))
+    return sort_by_date(df[DATA_COLUMNS])
+
+
+def shared_snapshot(path, version):
+    """Path of the Arrow snapshot for this data version, writing it if no process has yet.
+
+    The snapshot is written to a temporary name and renamed into place, so concurrent
+    workers either see a complete file or build their own identical copy.
+    """
+    source_key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    version_key = hashlib.sha1(repr(version).encode()).hexdigest()[:12]
+    target = os.path.join(SHARED_DIR, f"{source_key}-{version_key}.arrow")
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    table = pa.Table.from_pandas(_read_source(path), preserve_index=False)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, target)
+
+    # Older versions of the same source are no longer needed
+    for old in glob.glob(os.path.join(SHARED_DIR, f"{source_key}-*.arrow")):
+        if old != target:
+            try:
+                os.remove(old)
+            except OSError:
+                pass  # still mapped by another process (Windows)
+    return target
+
+
+# Data version each versioned cache last served, see clear_stale
+_served_versions = {}
+
+
+def clear_stale(cached, source):
+    """Empty the st.cache_resource function `cached` when the data `source` (path, version) changes.
+
+    Its entries are keyed by version, so those of older versions would otherwise stay in
+    memory until max_entries pushed them out.
+    """
+    if _served_versions.setdefault(cached, source) != source:
+        cached.clear()
+        _served_versions[cached] = source
+
+
+@st.cache_resource(show_spinner="Loading sales data...", max_entries=16)
+def _load_shared(path, version, columns):
+    # Numeric and date columns keep pointing into the memory-mapped snapshot, read-only, so the
+    # OS page cache holds one copy for all processes; to_pandas copies the string and
+    # categorical columns, so each process holds its own copy of those
+    table = pa.ipc.open_file(pa.memory_map(shared_snapshot(path, version))).read_all()
+    return table.select(list(columns)).to_pandas(split_blocks=True)
+
+
+def open_dataset(path):
+    """The hive-partitioned Parquet dataset at `path` (lists its files once)."""
+    import pyarrow.dataset as ds
+
+    return ds.dataset(path, format="parquet", partitioning="hive")
+
+
+def scan_batches(source, columns, filter=None, batch_rows=SCAN_BATCH_ROWS):
+    """Yield the Parquet dataset `source` (a path or an open_dataset()) as pandas frames of about `batch_rows` rows.
+
+    Small record batches (one per partition file) are combined before conversion.
+    """
+    dataset = open_dataset(source) if isinstance(source, str) else source
+    pending, rows = [], 0
+    for batch in dataset.scanner(columns=list(columns), filter=filter, batch_size=batch_rows).to_batches():
+        if batch.num_rows:
+            pending.append(batch)
+            rows += batch.num_rows
+        if rows >= batch_rows:
+            yield pa.Table.from_batches(pending).to_pandas()
+            pending, rows = [], 0
+    if pending:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+
+def data_source(path=None):
+    """Return the data path in use (Parquet dataset if built, else DATA_FILE) and its version."""
+    if path is None:
+        path = PARQUET_DIR if os.path.isdir(PARQUET_DIR) else DATA_FILE
+    return path, source_version(path)
+
+
+def load_sales_data(columns=None, path=None):
+    """Return the cleaned sales DataFrame (only `columns`), shared by every session and process.
+
+    The source (the Parquet dataset built by ingest.py, else DATA_FILE) is cleaned once per
+    data version into a memory-mapped Arrow snapshot that every worker maps. Numeric and date
+    columns are used in place; string and categorical columns are copied out of it per process.
+    The frame must not be modified; sessions keep only their filter selections and small results.
+    """
+    source = data_source(path)
+    clear_stale(_load_shared, source)
+    return _load_shared(*source, tuple(columns or DATA_COLUMNS))
@@ -0,0 +1,100 @@
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from data_loader import clear_stale, data_source
+
+
+PAGE_SIZES = [25, 50, 100, 250, 500]
+EXPORT_CHUNK_ROWS = 100_000
+
+
+@st.cache_resource(max_entries=32)
+def _sort_order(path, version, columns, column, _df):
+    # Row positions of the whole frame ordered by `column`, computed once per column
+    values = _df[column].reset_index(drop=True)
+    return values.sort_values(kind="stable", na_position="last").index.to_numpy()
+
+
+def page_positions(df, positions, page, page_size, sort_by=None, ascending=True):
+    """Row positions shown on one page of the (filtered, optionally sorted) rows.
+
+    `positions` are the filtered rows from FilterIndex.select, or None for every row.
+    Sorting reuses a cached order of the full column, so a page never sorts the filter result.
+    """
+    if sort_by is None:
+        order = np.arange(len(df)) if positions is None else positions
+    else:
+        source = data_source()
+        clear_stale(_sort_order, source)
+        order = _sort_order(*source, tuple(df.columns), sort_by, df)
+        if positions is not None:
+            keep = np.zeros(len(df), dtype=bool)
+            keep[positions] = True
+            order = order[keep[order]]
+        if not ascending:
+            order = order[::-1]
+
+    return order[page * page_size:(page + 1) * page_size]
+
+
+def describe_rows(df, positions):
+    """Summary statistics of the filtered rows, one numeric column at a time so the
+    filtered frame is never materialized."""
+    stats = {}
+    for col in df.select_dtypes("number").columns:
+        values = df[col] if positions is None else df[col].iloc[positions]
+        stats[col] = values.describe()
+    return pd.DataFrame(stats)
+
+
+def _chunks(df, positions):
+    total = len(df) if positions is None else len(positions)
+    for start in range(0, total, EXPORT_CHUNK_ROWS):
+        stop = start + EXPORT_CHUNK_ROWS
+        yield df.iloc[start:stop] if positions is None else df.iloc[positions[start:stop]]
+
+
+def _export_schema(table):
+    # Categorical codes are int8 or int16 depending on each chunk's categories; writing them all
+    # with int32 indices keeps every chunk on the schema the file was opened with
+    return pa.schema([field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+                      if pa.types.is_dictionary(field.type) else field for field in table.schema],
+                     metadata=table.schema.metadata)
+
+
+def write_export(chunks, file_format, empty):
+    """Write frames to a temporary file one chunk at a time and return it, rewound, for download.
+
+    `empty` is a zero-row frame used for the Parquet schema when there are no chunks.
+    """
+    out = tempfile.TemporaryFile()
+    if file_format == "csv":
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(out, header=i == 0, index=False)
+    elif file_format == "parquet":
+        writer = None
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = _export_schema(table)
+                writer = pq.ParquetWriter(out, schema)
+            writer.write_table(table.cast(schema))
+        if writer is None:
+            pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), out)
+        else:
+            writer.close()
+    else:
+        raise ValueError(f"Unsupported export format: {file_format}")
+
+    out.seek(0)
+    return out
+
+
+def export_rows(df, positions, file_format="csv"):
+    """Export the filtered rows of an in-memory frame in EXPORT_CHUNK_ROWS chunks."""
+    return write_export(_chunks(df, positions), file_format, df.iloc[:0])
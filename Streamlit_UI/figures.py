@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+
+# Longest line trace sent to the browser; longer series are downsampled with LTTB
+MAX_LINE_POINTS = 1000
+
+
+def bin_edges(lo, hi, nbins=20):
+    """Equal-width bin edges over [lo, hi], matching np.histogram_bin_edges."""
+    if lo is None or hi is None or np.isnan(lo) or np.isnan(hi):
+        lo, hi = 0.0, 1.0
+    elif lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, nbins + 1)
+
+
+def bin_counts(frames, x, edges, color=None, groups=None):
+    """Histogram counts of `x` accumulated over an iterable of frames.
+
+    With `color`, counts are split by the `groups` values of that column. Frames can be
+    chunks of a larger scan, so the rows never have to be in memory at once.
+    """
+    nbins = len(edges) - 1
+    groups = list(groups) if color is not None else [None]
+    grid = np.zeros((len(groups), nbins), dtype="int64")
+
+    for frame in frames:
+        values = frame[x].to_numpy(dtype="float64", na_value=np.nan)
+        valid = ~np.isnan(values)
+        bins = np.clip(np.searchsorted(edges, values[valid], side="right") - 1, 0, nbins - 1)
+        if color is None:
+            grid[0] += np.bincount(bins, minlength=nbins)
+        else:
+            codes = pd.Categorical(frame[color], categories=groups).codes[valid]
+            keep = codes >= 0
+            grid += np.bincount(codes[keep] * nbins + bins[keep], minlength=grid.size).reshape(grid.shape)
+
+    centers = (edges[:-1] + edges[1:]) / 2
+    counts = pd.DataFrame({x: np.tile(centers, len(groups)), "count": grid.ravel()})
+    if color is not None:
+        counts.insert(0, color, np.repeat(groups, nbins))
+        counts = counts[counts.groupby(color, observed=True)["count"].transform("sum") > 0]
+    return counts
+
+
+def histogram_figure(counts, x, color=None, **px_kwargs):
+    """Bar figure for counts from bin_counts, styled like px.histogram."""
+    centers = np.unique(counts[x].to_numpy())
+    fig = px.bar(counts, x=x, y="count", color=color, **px_kwargs)
+    if len(centers) > 1:
+        fig.update_traces(width=float(centers[1] - centers[0]))
+    fig.update_layout(bargap=0, barmode="stack")
+    return fig
+
+
+def lttb(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling."""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket is the third corner of the triangle
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+
+        areas = np.abs((x[previous] - avg_x) * (y[start:stop] - y[previous])
+                       - (x[previous] - x[start:stop]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        keep[i + 1] = previous
+
+    return keep
+
+
+def _downsample(frame, x, y, max_points):
+    if len(frame) <= max_points:
+        return frame
+    x_values = frame[x]
+    if pd.api.types.is_datetime64_any_dtype(x_values):
+        x_numeric = x_values.to_numpy().astype("int64")
+    elif pd.api.types.is_numeric_dtype(x_values):
+        x_numeric = x_values.to_numpy()
+    else:
+        x_numeric = np.arange(len(frame))  # e.g. "2019-01" month labels: evenly spaced
+    return frame.iloc[lttb(x_numeric, frame[y].to_numpy(), max_points)]
+
+
+def line(frame, x, y, color=None, max_points=MAX_LINE_POINTS, **px_kwargs):
+    """Drop-in for px.line that keeps each trace to at most `max_points` points (LTTB)."""
+    frame = frame.sort_values(x)
+    if color is None:
+        frame = _downsample(frame, x, y, max_points)
+    else:
+        frame = pd.concat([_downsample(part, x, y, max_points)
+                           for _, part in frame.groupby(color, observed=True, sort=False)])
+    return px.line(frame, x=x, y=y, color=color, **px_kwargs)
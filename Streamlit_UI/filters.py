@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import figures
+import timeseries
+from data_loader import CATEGORY_COLUMNS, clear_stale, data_source
+from dataset_view import describe_rows, export_rows, page_positions
+
+
+# KPI measures kept as per-day running totals, and how each is reported
+KPI_MEASURES = {"Revenue": "sum", "Profit": "sum", "rating": "mean"}
+
+
+def is_selected(value):
+    """True when a filter value should be applied ("All"/None mean no filter)."""
+    return value is not None and not (isinstance(value, str) and value == "All")
+
+
+def _to_day(value):
+    return np.datetime64(pd.Timestamp(value).normalize())
+
+
+class DateIndex:
+    """Binary-search date ranges over a frame already sorted by date (see data_loader.sort_by_date).
+
+    A date range maps to one contiguous block of rows, and per-day running totals of
+    the KPI measures give the range's totals from two lookups instead of a scan.
+    """
+
+    def __init__(self, df):
+        dates = df["date"].to_numpy()
+        valid = len(dates) - int(np.isnat(dates).sum())  # NaT rows are sorted last
+        self.days, starts = np.unique(dates[:valid], return_index=True)
+        self.day_starts = np.append(starts, valid)  # first row of each day, plus the end
+
+        self.cumulative = {}
+        for measure in KPI_MEASURES:
+            if measure not in df:
+                continue
+            values = df[measure].to_numpy(dtype="float64")
+            present = ~np.isnan(values)
+            values = np.where(present, values, 0.0)
+            sums = np.add.reduceat(values[:valid], starts) if valid else np.zeros(0)
+            counts = np.add.reduceat(present[:valid].astype("int64"), starts) if valid else np.zeros(0, dtype="int64")
+            # Undated rows follow the last day; only a query without a date range includes them
+            sums = np.append(sums, values[valid:].sum())
+            counts = np.append(counts, present[valid:].sum())
+            self.cumulative[measure] = (np.concatenate([[0.0], np.cumsum(sums)]),
+                                        np.concatenate([[0], np.cumsum(counts)]))
+
+    def bounds(self):
+        """First and last day in the data."""
+        return pd.Timestamp(self.days[0]), pd.Timestamp(self.days[-1])
+
+    def _day_range(self, start, end):
+        lo = 0 if start is None else int(np.searchsorted(self.days, _to_day(start), side="left"))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, _to_day(end), side="right"))
+        return lo, max(lo, hi)
+
+    def row_range(self, start=None, end=None):
+        """[first, last) row positions of the days between `start` and `end` inclusive."""
+        lo, hi = self._day_range(start, end)
+        return int(self.day_starts[lo]), int(self.day_starts[hi])
+
+    def kpis(self, start=None, end=None):
+        """Total Revenue/Profit and mean rating for the date range (every row when there is none)."""
+        lo, hi = self._day_range(start, end)
+        if start is None and end is None:
+            hi += 1
+        result = {}
+        for measure, (sums, counts) in self.cumulative.items():
+            total, n = sums[hi] - sums[lo], counts[hi] - counts[lo]
+            if KPI_MEASURES[measure] == "sum":
+                result[measure] = float(total)
+            else:
+                result[measure] = float(total / n) if n else float("nan")
+        return result
+
+
+class FilterIndex:
+    """Per-value row positions for the categorical columns of a frame.
+
+    Each column is stored as its row positions grouped by category code plus the
+    offsets of every group, so the rows for a value are a slice and multi-column
+    filters are sorted-array intersections instead of full string scans.
+
+    Pages use it through the row-level interface it shares with out_of_core.ScanEngine
+    (values, date_bounds, kpis, count, histogram, trend, page, describe, export).
+    """
+
+    sortable = True
+
+    def __init__(self, df, columns=None):
+        self.df = df
+        self.columns = list(df.columns)
+        self.indexed = [c for c in (columns or CATEGORY_COLUMNS) if c in df]
+        self._index = {}
+        for col in self.indexed:
+            values = df[col].astype("category").cat
+            codes = values.codes.to_numpy()
+            order = np.argsort(codes, kind="stable")  # stable: positions stay ascending within a value
+            offsets = np.searchsorted(codes[order], np.arange(len(values.categories) + 1))
+            self._index[col] = (values.categories, order, offsets)
+
+        self.dates = DateIndex(df) if "date" in df else None
+        # Hour and month keys of every row, from which trend() derives any granularity
+        self.time_keys = timeseries.time_keys(df["datetime"]) if "datetime" in df else None
+
+    def values(self, column):
+        """Sorted values of `column` that occur in the data (for selectbox options)."""
+        categories, _, offsets = self._index[column]
+        present = np.diff(offsets) > 0
+        return sorted(categories[present])
+
+    def rows(self, column, value):
+        """Ascending row positions where `column` equals `value` (or any of a list of values)."""
+        categories, order, offsets = self._index[column]
+        wanted = value if pd.api.types.is_list_like(value) else [value]
+        codes = categories.get_indexer(list(wanted))
+        parts = [order[offsets[c]:offsets[c + 1]] for c in codes if c >= 0]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    def select(self, **equals):
+        """Row positions matching every selected filter, or None when nothing is filtered."""
+        matches = [self.rows(col, value) for col, value in equals.items() if is_selected(value)]
+        if not matches:
+            return None
+        matches.sort(key=len)
+        positions = matches[0]
+        for other in matches[1:]:
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+    def positions(self, start=None, end=None, **equals):
+        """Row positions (array or slice) for a date range and column values, or None for all rows."""
+        positions = self.select(**equals)
+        if start is None and end is None:
+            return positions
+
+        lo, hi = self.dates.row_range(start, end)
+        if positions is None:
+            return slice(lo, hi)
+        return positions[np.searchsorted(positions, lo):np.searchsorted(positions, hi)]
+
+    def apply(self, start=None, end=None, columns=None, **equals):
+        """Filtered frame (optionally only `columns`) for a date range and column values.
+
+        A date range alone is a zero-copy slice of the shared frame, and with no filters
+        the shared frame itself is returned.
+        """
+        df = self.df if columns is None else self.df[columns]
+        positions = self.positions(start, end, **equals)
+        return df if positions is None else df.iloc[positions]
+
+    def date_bounds(self):
+        return self.dates.bounds()
+
+    def kpis(self, start=None, end=None):
+        """Date-range KPIs from the per-day running totals."""
+        return self.dates.kpis(start, end)
+
+    def count(self, **equals):
+        positions = self.select(**equals)
+        return len(self.df) if positions is None else len(positions)
+
+    def histogram(self, x, nbins=20, color=None, start=None, end=None, **equals):
+        """Bin counts of `x` over the filtered rows, for figures.histogram_figure."""
+        frame = self.apply(start, end, columns=[x] if color is None else [x, color], **equals)
+        edges = figures.bin_edges(frame[x].min(), frame[x].max(), nbins)
+        groups = self.values(color) if color is not None else None
+        return figures.bin_counts([frame], x, edges, color=color, groups=groups)
+
+    def trend(self, measure, granularity="month", how="sum", start=None, end=None, **equals):
+        """Per-bucket sum (or mean) of `measure` at `granularity`, over the filtered rows only."""
+        positions = self.positions(start, end, **equals)
+        rows = slice(None) if positions is None else positions
+        hours, months = (keys[rows] for keys in self.time_keys)
+        values = self.df[measure].to_numpy(dtype="float64", na_value=np.nan)[rows]
+        sums = timeseries.partial_sums(hours, months, values, granularity)
+        return timeseries.trend_frame(sums, measure, granularity, how)
+
+    def page(self, page, page_size, sort_by=None, ascending=True, **equals):
+        positions = self.select(**equals)
+        return self.df.iloc[page_positions(self.df, positions, page, page_size, sort_by, ascending)]
+
+    def describe(self, **equals):
+        return describe_rows(self.df, self.select(**equals))
+
+    def export(self, file_format="csv", **equals):
+        return export_rows(self.df, self.select(**equals), file_format)
+
+
+@st.cache_resource(max_entries=16)
+def _load_index(path, version, columns, _df):
+    # `_df` is not hashed; the data version and column set identify it
+    return FilterIndex(_df)
+
+
+def load_filter_index(df):
+    """Return the FilterIndex for a frame from load_sales_data, built once per data version."""
+    source = data_source()
+    clear_stale(_load_index, source)
+    return _load_index(*source, tuple(df.columns), df)
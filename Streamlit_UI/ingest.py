@@ -0,0 +1,185 @@
+"""Convert the raw sales CSV into a cleaned, partitioned Parquet dataset, and append daily files to it.
+
+Usage:
+    python ingest.py Wallmart.csv --out Wallmart_parquet      # one-time full conversion
+    python ingest.py --append drop/ --out Wallmart_parquet    # add new CSVs dropped in drop/
+    python ingest.py --append drop/ --watch --interval 60     # keep polling drop/
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_loader import CSV_DTYPES, CUBE_FILE, DATA_COLUMNS, DATA_FILE, MANIFEST_FILE, PARQUET_DIR, PARTITION_COLUMNS, clean_sales_data, scan_batches
+from rollup import DIMENSIONS, MEASURES, build_cube, build_cube_from_batches, merge_cubes, read_cube
+
+
+# Dropped files younger than this may still be being written
+SETTLE_SECONDS = 5
+
+
+def write_partitions(df, out_dir, tag):
+    """Append a cleaned frame to the dataset, one file per year/month/Branch partition."""
+    df = df.assign(year=df["date"].dt.year.astype("Int16"), month=df["date"].dt.month.astype("Int8"))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_to_dataset(table, out_dir, partition_cols=PARTITION_COLUMNS,
+                        basename_template=f"{tag}-{{i}}.parquet", existing_data_behavior="overwrite_or_ignore",
+                        max_partitions=1 << 16)
+
+
+def write_cube(cube, out_dir):
+    # Write then rename so the app never reads a half-written cube
+    tmp_path = os.path.join(out_dir, CUBE_FILE + ".tmp")
+    cube.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, os.path.join(out_dir, CUBE_FILE))
+
+
+def convert_csv(csv_path, out_dir, chunk_size=1_000_000):
+    """Convert `csv_path` chunk by chunk so memory stays bounded by `chunk_size` rows."""
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+
+    rows, cube = 0, None
+    for i, chunk in enumerate(pd.read_csv(csv_path, dtype=CSV_DTYPES, chunksize=chunk_size)):
+        chunk = clean_sales_data(chunk)[DATA_COLUMNS]
+        write_partitions(chunk, out_dir, tag=f"part{i:05d}")
+        cube = merge_cubes(cube, build_cube(chunk))
+        rows += len(chunk)
+
+    if cube is not None:
+        write_cube(cube, out_dir)
+    return rows
+
+
+def _read_manifest(out_dir):
+    # Files already appended, by name, with the mtime/size they had when ingested
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(out_dir, manifest):
+    tmp_path = os.path.join(out_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST_FILE))
+
+
+def new_drop_files(drop_dir, manifest):
+    """CSV files in `drop_dir` that are settled and not yet ingested in their current state."""
+    found = []
+    for path in sorted(glob.glob(os.path.join(drop_dir, "*.csv"))):
+        stat = os.stat(path)
+        if time.time() - stat.st_mtime < SETTLE_SECONDS:
+            continue
+        if manifest.get(os.path.basename(path)) != [stat.st_mtime_ns, stat.st_size]:
+            found.append(path)
+    return found
+
+
+def _checked_cube(out_dir, rows):
+    """The stored cube, rebuilt from the dataset when it is missing or does not cover its `rows` rows.
+
+    That happens with datasets converted before the cube existed, and when a run stopped between
+    writing a file's partitions and saving the cube; those rows would otherwise be skipped as
+    duplicates from then on and never reach the cube.
+    """
+    cube = read_cube(out_dir)
+    if cube is None or int(cube["count"].sum()) != rows:
+        print(f"Rebuilding {CUBE_FILE} from the {rows:,} stored rows")
+        cube = build_cube_from_batches(scan_batches(out_dir, DIMENSIONS + MEASURES))
+        if cube is not None:
+            write_cube(cube, out_dir)
+    return cube
+
+
+def append_files(drop_dir, out_dir, known_ids=None):
+    """Append new files from `drop_dir` to the dataset and fold them into the stored cube.
+
+    Rows whose invoice_id is already stored (or repeated in the file) are skipped. Only the
+    new rows are cleaned and aggregated; the stored cube is updated by adding their rollup,
+    file by file. Files that cannot be parsed are reported and skipped.
+    Returns the number of appended rows and the updated array of known invoice ids.
+    """
+    if not os.path.isdir(out_dir):
+        raise SystemExit(f"{out_dir} does not exist; run a full conversion first")
+
+    manifest = _read_manifest(out_dir)
+    paths = new_drop_files(drop_dir, manifest)
+    if not paths:
+        return 0, known_ids
+
+    if known_ids is None:
+        # First poll: the ids are read anyway, so check the cube against them once
+        known_ids = pd.read_parquet(out_dir, columns=["invoice_id"])["invoice_id"].to_numpy()
+        cube = _checked_cube(out_dir, len(known_ids))
+    else:
+        cube = read_cube(out_dir)
+
+    rows = 0
+    for path in paths:
+        name = os.path.basename(path)
+        try:
+            df = clean_sales_data(pd.read_csv(path, dtype=CSV_DTYPES))[DATA_COLUMNS]
+        except (OSError, ValueError, KeyError) as error:
+            # Left out of the manifest, so it is tried again on the next poll (e.g. once fixed)
+            print(f"{name}: skipped, could not be parsed ({type(error).__name__}: {error})")
+            continue
+        df = df.drop_duplicates("invoice_id")
+        df = df[~np.isin(df["invoice_id"].to_numpy(), known_ids)]
+
+        if len(df):
+            tag = f"append-{time.strftime('%Y%m%d%H%M%S')}-{os.path.splitext(name)[0]}"
+            write_partitions(df, out_dir, tag=tag)
+            # Saved with every file: rows in the dataset must never be missing from the cube,
+            # since the next run would skip them as duplicates
+            cube = merge_cubes(cube, build_cube(df))
+            write_cube(cube, out_dir)
+            known_ids = np.concatenate([known_ids, df["invoice_id"].to_numpy()])
+            rows += len(df)
+
+        stat = os.stat(path)
+        manifest[name] = [stat.st_mtime_ns, stat.st_size]
+        _write_manifest(out_dir, manifest)
+        print(f"{name}: appended {len(df):,} new rows")
+
+    return rows, known_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or extend the partitioned Parquet sales dataset.")
+    parser.add_argument("csv", nargs="?", default=DATA_FILE, help="raw sales CSV (default: %(default)s)")
+    parser.add_argument("--out", default=PARQUET_DIR, help="output directory (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="rows parsed per chunk")
+    parser.add_argument("--append", metavar="DROP_DIR", help="append new CSV files from DROP_DIR instead of converting")
+    parser.add_argument("--watch", action="store_true", help="with --append, keep polling DROP_DIR")
+    parser.add_argument("--interval", type=float, default=60, help="seconds between polls with --watch")
+    args = parser.parse_args()
+
+    if args.append is None:
+        start = time.perf_counter()
+        rows = convert_csv(args.csv, args.out, args.chunk_size)
+        print(f"Wrote {rows:,} rows to {args.out} in {time.perf_counter() - start:.1f}s")
+        return
+
+    known_ids = None
+    while True:
+        rows, known_ids = append_files(args.append, args.out, known_ids)
+        if rows:
+            print(f"Appended {rows:,} rows to {args.out}")
+        if not args.watch:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import calendar
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import timeseries
+from data_loader import OUT_OF_CORE, data_source, load_sales_data, scan_batches
+from rollup import load_cube
+
+
+# Entries listed per ranking
+TOP_N = 3
+# Ratings at or above this count as high satisfaction
+HIGH_RATING = 8
+# Row-level columns for the findings the day-grain cube cannot answer (hour of day, rating skew)
+ROW_COLUMNS = ["datetime", "Revenue", "rating"]
+
+
+def group_totals(cube, by):
+    """Transactions, Revenue, Profit, quantity, margin and spend per transaction for each `by` value."""
+    sums = cube.groupby(by, observed=True)[["count", "Revenue_count", "Revenue_sum", "Profit_sum", "quantity_sum"]].sum()
+    sums = sums[sums["count"] > 0]
+    return pd.DataFrame({
+        "transactions": sums["count"],
+        "Revenue": sums["Revenue_sum"],
+        "Profit": sums["Profit_sum"],
+        "quantity": sums["quantity_sum"],
+        "margin": sums["Profit_sum"] / sums["Revenue_sum"],
+        "spend": sums["Revenue_sum"] / sums["Revenue_count"],
+    })
+
+
+def row_stats(frames):
+    """Revenue and transactions by hour of day and rating moments, accumulated over an iterable of frames."""
+    hour_revenue, hour_count = np.zeros(24), np.zeros(24, dtype="int64")
+    n, s1, s2, s3, high = 0, 0.0, 0.0, 0.0, 0
+
+    for frame in frames:
+        hours, _ = timeseries.time_keys(frame["datetime"])
+        revenue = frame["Revenue"].to_numpy(dtype="float64", na_value=np.nan)
+        timed = hours != timeseries.MISSING_KEY
+        hour_count += np.bincount(hours[timed] % 24, minlength=24)
+        valid = timed & ~np.isnan(revenue)
+        hour_revenue += np.bincount(hours[valid] % 24, weights=revenue[valid], minlength=24)
+
+        rating = frame["rating"].to_numpy(dtype="float64", na_value=np.nan)
+        rating = rating[~np.isnan(rating)]
+        n += len(rating)
+        s1, s2, s3 = s1 + rating.sum(), s2 + np.square(rating).sum(), s3 + np.power(rating, 3).sum()
+        high += int((rating >= HIGH_RATING).sum())
+
+    mean = s1 / n if n else float("nan")
+    # Skewness from raw moments: E[(x - mean)^3] / var^1.5
+    var = s2 / n - mean ** 2 if n else float("nan")
+    third = s3 / n - 3 * mean * s2 / n + 2 * mean ** 3 if n else float("nan")
+    skew = third / var ** 1.5 if n and var > 0 else float("nan")
+    return {
+        "hour_revenue": hour_revenue,
+        "hour_count": hour_count,
+        "rating": {"mean": mean, "high_share": high / n if n else float("nan"), "skew": skew},
+    }
+
+
+def _top(series, n=TOP_N, ascending=False):
+    series = series.sort_values(ascending=ascending).head(n)
+    return [(str(name), float(value)) for name, value in series.items()]
+
+
+def compute_insights(cube, frames, top_n=TOP_N):
+    """Findings for the Key Insights page, as plain values.
+
+    Everything per city/branch/category/payment method and per month or weekday comes
+    from the rollup cube; one pass over `frames` (ROW_COLUMNS) adds hour of day and the
+    rating distribution.
+    """
+    rows = row_stats(frames)
+
+    rankings = {}
+    for column in ["City", "Branch", "category"]:
+        totals = group_totals(cube, column)
+        rankings[column] = {
+            "revenue": _top(totals["Revenue"], top_n),
+            "profit": _top(totals["Profit"], top_n),
+            "least_profit": _top(totals["Profit"], top_n, ascending=True),
+            "margin": _top(totals["margin"], top_n),
+            "lowest_margin": _top(totals["margin"], 1, ascending=True),
+            "quantity": _top(totals["quantity"], top_n),
+            "fewest_transactions": _top(totals["transactions"], 1, ascending=True),
+        }
+
+    dates = cube["date"]
+    months = group_totals(cube, dates.dt.month.rename("month"))["Revenue"]
+    weekdays = group_totals(cube, dates.dt.dayofweek.rename("weekday"))["Revenue"]
+    hours = pd.Series(rows["hour_count"], index=range(24))[rows["hour_count"] > 0]
+
+    payment = group_totals(cube, "payment_method")
+    return {
+        "transactions": int(cube["count"].sum()),
+        "rankings": rankings,
+        "months": [(calendar.month_name[int(m)], v) for m, v in _top(months, top_n)],
+        "weekdays": [(calendar.day_name[int(d)], v) for d, v in _top(weekdays, 2)],
+        "hours": [(int(h), v) for h, v in _top(hours, top_n)],
+        "payment_share": _top(payment["transactions"] / payment["transactions"].sum(), len(payment)),
+        "payment_spend": _top(payment["spend"], len(payment)),
+        "rating": rows["rating"],
+    }
+
+
+def _names(entries):
+    return ", ".join(f"`{name}`" for name, _ in entries) or "n/a"
+
+
+def _hour_label(hour):
+    return f"{hour % 12 or 12}:00 {'AM' if hour < 12 else 'PM'}"
+
+
+def insights_markdown(insights):
+    """Render compute_insights output as the Key Insights markdown."""
+    if not insights["transactions"]:
+        return "\n### 🎯 **Key Insights**\n\n_No transactions yet, so there is nothing to report._\n"
+    cities, branches, categories = (insights["rankings"][c] for c in ["City", "Branch", "category"])
+    rating = insights["rating"]
+    spend = insights["payment_spend"] or [("n/a", float("nan"))]
+    popular = insights["payment_share"][0] if insights["payment_share"] else ("n/a", float("nan"))
+    # Negative skewness is a long tail of low ratings, i.e. most ratings sit at the high end
+    leaning = "high" if rating["skew"] < 0 else "low"
+
+    return f"""
+### 🎯 **Key Insights**
+
+_Computed from {insights['transactions']:,} transactions._
+
+#### 🏙️ **City-Level Performance**
+- 🌆 **Top Performing Cities by Revenue**: {_names(cities['revenue'])}
+- 🌇 **Most Profitable Cities**: {_names(cities['profit'])}
+- 🔻 **Least Profitable Cities**: {_names(cities['least_profit'])}
+- 🏬 **Top Branches by Revenue**: {_names(branches['revenue'])}
+- 💹 **Highest-Margin Branches**: {_names(branches['margin'])}
+
+#### 📦 **Product Categories**
+- 🥇 **Best-Selling Categories**: {_names(categories['quantity'])}
+- 💰 **Highest-Margin Categories**: {_names(categories['margin'])}
+- 📉 **Fewest Transactions**: {_names(categories['fewest_transactions'])}
+
+#### 🧾 **Sales & Revenue Trends**
+- 📆 **Peak Sales Months**: {', '.join(name for name, _ in insights['months']) or 'n/a'}
+- 📈 **Strongest Weekdays**: {', '.join(name for name, _ in insights['weekdays']) or 'n/a'}
+- 🕐 **Most Active Hours**: {', '.join(_hour_label(hour) for hour, _ in insights['hours']) or 'n/a'}
+
+#### 💳 **Payment Insights**
+- 💳 **Popular Payment Method**: `{popular[0]}` ({popular[1]:.0%} of transactions)
+- 💵 **Highest Spend per Transaction**: `{spend[0][0]}` (${spend[0][1]:,.2f})
+- 💸 **Lowest Spend per Transaction**: `{spend[-1][0]}` (${spend[-1][1]:,.2f})
+
+#### 🤝 **Customer Behavior**
+- ⭐ **Average Customer Rating**: {rating['mean']:.1f} / 10
+- 👍 **Rated {HIGH_RATING} or Higher**: {rating['high_share']:.0%} of rated transactions
+- 📊 **Ratings lean toward {leaning} scores** (skewness {rating['skew']:.2f})
+
+#### 💹 **Profitability**
+- 💎 **Most Profitable Categories**: {_names(categories['profit'])}
+- 🔍 **Lowest Margin**: {_names(categories['lowest_margin'])}
+"""
+
+
+@st.cache_resource(show_spinner="Computing insights...", max_entries=2)
+def _load_insights(path, version):
+    frames = scan_batches(path, ROW_COLUMNS) if OUT_OF_CORE else [load_sales_data(ROW_COLUMNS, path)]
+    return insights_markdown(compute_insights(load_cube(), frames))
+
+
+def load_insights():
+    """Key Insights markdown for the current dataset, computed once per data version."""
+    return _load_insights(*data_source())
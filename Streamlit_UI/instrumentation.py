@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import streamlit as st
+
+
+# Signed-in emails that see the instrumentation panel (comma separated)
+ADMIN_EMAILS = {email.strip() for email in os.environ.get("SALES_ADMIN_EMAILS", "").split(",") if email.strip()}
+# When set, every rerun's records are appended to this file as JSON lines
+METRICS_LOG = os.environ.get("SALES_METRICS_LOG")
+# Records kept in memory for the panel and exports
+RECENT_RECORDS = 5000
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(section, stage):
+    return f'{{section="{_escape(section)}",stage="{_escape(stage)}"}}'
+
+
+def _points(fig):
+    # Data points across the traces (x for cartesian charts, values for pies and treemaps)
+    n = 0
+    for data in fig.data:
+        for attr in ("x", "values"):
+            values = getattr(data, attr, None)
+            if values is not None:
+                n += len(values)
+                break
+    return n
+
+
+class MetricsStore:
+    """Process-wide stage records: the most recent ones, plus running totals per section and stage."""
+
+    def __init__(self, max_records=RECENT_RECORDS):
+        self._recent = deque(maxlen=max_records)
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def add(self, records):
+        with self._lock:
+            self._recent.extend(records)
+            for r in records:
+                totals = self._totals.setdefault((r["section"], r["stage"]), [0, 0.0, 0, 0])
+                totals[0] += 1
+                totals[1] += r["seconds"]
+                totals[2] += r["rows"] or 0
+                totals[3] += r["bytes"] or 0
+
+    def records(self):
+        with self._lock:
+            return list(self._recent)
+
+    def summary(self):
+        """Count, total and mean seconds, rows and bytes per (section, stage)."""
+        with self._lock:
+            return [{"section": section, "stage": stage, "count": n, "total_seconds": seconds,
+                     "mean_ms": seconds / n * 1000, "rows": rows, "bytes": size}
+                    for (section, stage), (n, seconds, rows, size) in sorted(self._totals.items())]
+
+    def json_lines(self):
+        return "".join(json.dumps(r) + "\n" for r in self.records())
+
+    def prometheus(self, cache_stats=None):
+        """Totals in the Prometheus text exposition format."""
+        lines = ["# HELP sales_stage_seconds Time spent per dashboard section and stage.",
+                 "# TYPE sales_stage_seconds summary"]
+        summary = self.summary()
+        for s in summary:
+            lines.append(f"sales_stage_seconds_sum{_labels(s['section'], s['stage'])} {s['total_seconds']:.6f}")
+            lines.append(f"sales_stage_seconds_count{_labels(s['section'], s['stage'])} {s['count']}")
+        lines += ["# HELP sales_stage_rows_total Rows handled per section and stage.",
+                  "# TYPE sales_stage_rows_total counter"]
+        lines += [f"sales_stage_rows_total{_labels(s['section'], s['stage'])} {s['rows']}" for s in summary]
+        lines += ["# HELP sales_stage_bytes_total Payload bytes per section and stage.",
+                  "# TYPE sales_stage_bytes_total counter"]
+        lines += [f"sales_stage_bytes_total{_labels(s['section'], s['stage'])} {s['bytes']}" for s in summary]
+        for key, value in (cache_stats or {}).items():
+            lines.append(f"# TYPE sales_query_cache_{key} gauge")
+            lines.append(f"sales_query_cache_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+
+@st.cache_resource
+def get_metrics_store():
+    """The process-wide MetricsStore."""
+    return MetricsStore()
+
+
+class RenderTrace:
+    """Timings, row counts and payload sizes of the stages of one rerun of one section.
+
+    Figure and table sizes cost a JSON serialization or a deep memory count, so they are
+    only measured when `detailed` (someone sees the admin panel, or METRICS_LOG is set).
+    """
+
+    def __init__(self, section, detailed=False):
+        self.section = section
+        self.detailed = detailed or bool(METRICS_LOG)
+        self.rerun = uuid.uuid4().hex[:12]
+        self.records = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, rows=None, size=None):
+        """Time the `with` block; the yielded dict's "rows" and "bytes" can be filled in inside it."""
+        record = {"rows": rows, "bytes": size}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.records.append({"time": time.time(), "rerun": self.rerun, "section": self.section, "stage": name,
+                                 "seconds": time.perf_counter() - start, "rows": record["rows"], "bytes": record["bytes"]})
+
+    def plotly_chart(self, fig, **kwargs):
+        """st.plotly_chart, recording the points sent and the figure's JSON size."""
+        title = fig.layout.title.text or "figure"
+        with self.stage(f"chart {title}", rows=_points(fig), size=len(fig.to_json()) if self.detailed else None):
+            st.plotly_chart(fig, **kwargs)
+
+    def dataframe(self, df, name="table", **kwargs):
+        """st.dataframe, recording the rows sent and their in-memory size."""
+        size = int(df.memory_usage(deep=True).sum()) if self.detailed else None
+        with self.stage(f"dataframe {name}", rows=len(df), size=size):
+            st.dataframe(df, **kwargs)
+
+    def finish(self):
+        """Close the rerun: keep its records for this session, the process totals and the log file."""
+        self.records.append({"time": time.time(), "rerun": self.rerun, "section": self.section, "stage": "rerun",
+                             "seconds": time.perf_counter() - self._start, "rows": None, "bytes": None})
+        get_metrics_store().add(self.records)
+        if METRICS_LOG:
+            with open(METRICS_LOG, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(r) + "\n" for r in self.records)
+
+
+def start_trace(section, detailed=False):
+    """Begin tracing this rerun; cached queries record into it (see query_cache.cached_query)."""
+    trace = RenderTrace(section, detailed)
+    st.session_state["render_trace"] = trace
+    return trace
+
+
+def trace_stage(name, **kwargs):
+    """A stage of the current rerun's trace, or a no-op outside a traced rerun."""
+    trace = st.session_state.get("render_trace")
+    return trace.stage(name, **kwargs) if trace is not None else nullcontext({})
+
+
+def is_admin(user_id):
+    return user_id is not None and user_id in ADMIN_EMAILS
+
+
+def admin_panel(trace, cache_stats=None):
+    """Sidebar panel with this rerun's stages, the process totals and the exports."""
+    store = get_metrics_store()
+    with st.sidebar.expander("⏱️ Instrumentation (admin)"):
+        total = trace.records[-1]["seconds"] if trace.records else 0.0
+        st.caption(f"{trace.section}: rerun {trace.rerun} took {total * 1000:.0f} ms")
+        st.dataframe([{"stage": r["stage"], "ms": round(r["seconds"] * 1000, 1), "rows": r["rows"], "bytes": r["bytes"]}
+                      for r in trace.records])
+        st.markdown("**All reruns in this process**")
+        st.dataframe(store.summary())
+        if cache_stats:
+            st.markdown("**Query cache**")
+            st.json(cache_stats)
+        st.download_button("Download JSON lines", store.json_lines(), file_name="sales_metrics.jsonl")
+        st.download_button("Download Prometheus text", store.prometheus(cache_stats), file_name="sales_metrics.prom")
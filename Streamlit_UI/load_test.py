@@ -0,0 +1,360 @@
+"""Load-test the dashboard with concurrent analyst sessions against one local Streamlit server.
+
+Usage:
+    python load_test.py                                   # 1, 5 and 10 sessions, 30 s each
+    python load_test.py --sessions 1 5 10 20 50 --duration 60 --json load.json
+    python load_test.py --think 0                         # closed loop: as fast as the server answers
+    python load_test.py --url http://127.0.0.1:8501 --pid 1234 --email me@example.com --password ...
+
+Without --url the app is started with `streamlit run` in the current directory (so it finds
+the dataset as usual), with a temporary user database holding one load-test account. Each
+session is a websocket client speaking the browser's protocol: it logs in, then keeps
+visiting Sales Overview, Customer Insights, Product Performance, Branch Performance and
+Dataset, giving random values to each page's filters (city, category, date range,
+granularity, payment method, branch code, page size, sort, page number) and pausing for
+the think time between reruns.
+
+Rerun latency is the time from sending a rerun to the server's script_finished message
+(following any st.rerun), so it covers script execution and every message the page sends.
+Throughput is completed reruns per second. The server's resident memory is sampled while
+the sessions run. The client shares the machine with the server: on few cores its own CPU
+time (printed with each level) is taken from the server, so keep a think time above zero.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.NumberInput_pb2 import NumberInput
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from user_store import UserStore
+
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Home_Page.py")
+PAGES = ["Sales Overview", "Customer Insights", "Product Performance", "Branch Performance", "Dataset"]
+DEFAULT_SESSIONS = [1, 5, 10]
+# Widget types given random values on each page (the menu and buttons are driven separately)
+FILTER_WIDGETS = ("selectbox", "radio", "date_input", "number_input", "text_input")
+LOAD_TEST_EMAIL, LOAD_TEST_PASSWORD = "load-test@example.com", "load-test-password"
+BRANCHES = 100  # WALM001 .. WALM100
+# Seconds between RSS samples of the server process
+SAMPLE_INTERVAL = 0.25
+PERCENTILES = (50, 95, 99)
+
+
+class LoginError(Exception):
+    pass
+
+
+class AppSession:
+    """One browser tab: a websocket to the server, its widget values and the widgets of the last run."""
+
+    def __init__(self, url, timeout=120):
+        self.url = url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.timeout = timeout
+        self.widgets = {}  # id -> (element type, proto, in sidebar), as rendered by the last run
+        self.states = {}  # id -> WidgetState sent with every rerun
+        self.errors = []  # exceptions the app rendered
+        self._ws = None
+
+    async def connect(self):
+        self._ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+
+    def set(self, widget_id, **value):
+        self.states[widget_id] = WidgetState(id=widget_id, **value)
+
+    def find(self, element_type, label):
+        return next(widget_id for widget_id, (kind, proto, _) in self.widgets.items()
+                    if kind == element_type and label in proto.label)
+
+    async def rerun(self):
+        """Send the widget values and wait for the run (and any st.rerun it triggers); returns seconds."""
+        msg = BackMsg()
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        # Buttons fire once, like a click
+        self.states = {k: s for k, s in self.states.items() if s.WhichOneof("value") != "trigger_value"}
+        start = time.perf_counter()
+        await self._ws.send(msg.SerializeToString())
+        self.widgets = await asyncio.wait_for(self._receive_run(), self.timeout)
+        seconds = time.perf_counter() - start
+        # The browser forgets the values of widgets that are no longer on the page
+        self.states = {k: s for k, s in self.states.items() if k in self.widgets}
+        return seconds
+
+    async def _receive_run(self):
+        widgets = {}
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self._ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element_type = msg.delta.new_element.WhichOneof("type")
+                proto = getattr(msg.delta.new_element, element_type)
+                if element_type == "exception" and not proto.is_warning:
+                    self.errors.append(f"{proto.type}: {proto.message}")
+                elif getattr(proto, "id", ""):
+                    widgets[proto.id] = (element_type, proto, msg.metadata.delta_path[0] == 1)
+            elif kind == "script_finished":
+                if msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    widgets = {}  # st.rerun: the next run replaces the page
+                    continue
+                return widgets
+
+    async def navigate(self, section):
+        """Pick `section` in the sidebar menu."""
+        menu = next(widget_id for widget_id, (kind, _, sidebar) in self.widgets.items()
+                    if kind == "component_instance" and sidebar)
+        self.set(menu, json_value=json.dumps(section))
+        return await self.rerun()
+
+    async def login(self, email, password):
+        await self.rerun()  # first load: the Register page
+        await self.navigate("Login")
+        self.set(self.find("text_input", "Email"), string_value=email)
+        self.set(self.find("text_input", "Password"), string_value=password)
+        self.set(self.find("button", "Login"), trigger_value=True)
+        seconds = await self.rerun()
+        if not any(kind == "component_instance" and "Welcome" in proto.json_args
+                   for kind, proto, _ in self.widgets.values()):
+            raise LoginError(f"could not log in as {email}")
+        return seconds
+
+
+def _parse_date(text):
+    return datetime.datetime.strptime(text.replace("-", "/"), "%Y/%m/%d").date()
+
+
+def random_value(element_type, proto, rng):
+    """WidgetState keyword arguments giving a filter widget a random value."""
+    if element_type in ("selectbox", "radio"):
+        return {"string_value": rng.choice(list(proto.options))}
+    if element_type == "date_input":
+        # The default spans the dataset; pick a sub-range of it
+        first, last = _parse_date(proto.default[0]), _parse_date(proto.default[-1])
+        offsets = sorted(rng.randint(0, (last - first).days) for _ in range(2))
+        dates = [(first + datetime.timedelta(days=d)).isoformat() for d in offsets]
+        return {"string_array_value": {"data": dates if proto.is_range else dates[:1]}}
+    if element_type == "number_input":
+        if proto.data_type == NumberInput.INT:
+            return {"double_value": rng.randint(int(proto.min), int(proto.max))}
+        return {"double_value": rng.uniform(proto.min, proto.max)}
+    # The only text box on the analytics pages is the branch search: a full code or a prefix
+    if rng.random() < 0.5:
+        return {"string_value": f"WALM{rng.randint(1, BRANCHES):03d}"}
+    return {"string_value": f"walm0{rng.randint(0, 9)}"}
+
+
+async def visit(session, section, rng, interactions, think, latencies):
+    """Open `section`, then change `interactions` random filters one rerun at a time."""
+    latencies[section].append(await session.navigate(section))
+    for _ in range(interactions):
+        filters = [(widget_id, kind, proto) for widget_id, (kind, proto, _) in session.widgets.items()
+                   if kind in FILTER_WIDGETS and not proto.disabled]
+        if not filters:
+            break
+        await asyncio.sleep(rng.uniform(0.5, 1.5) * think)
+        widget_id, kind, proto = rng.choice(filters)
+        session.set(widget_id, **random_value(kind, proto, rng))
+        latencies[section].append(await session.rerun())
+
+
+async def run_session(url, account, deadline, rng, args, latencies, errors):
+    """Log in and browse random sections until `deadline`, reconnecting after failures."""
+    await asyncio.sleep(rng.uniform(0, args.think))  # spread the logins out
+    while time.monotonic() < deadline:
+        session = AppSession(url, args.timeout)
+        try:
+            await session.connect()
+            latencies["Login"].append(await session.login(*account))
+            while time.monotonic() < deadline:
+                await visit(session, rng.choice(args.pages), rng, args.interactions, args.think, latencies)
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think)
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException, LoginError) as error:
+            errors.append(f"{type(error).__name__}: {error}")
+        finally:
+            errors.extend(session.errors)
+            await session.close()
+
+
+def server_rss_mb(pid):
+    """Resident set size of process `pid` in MB, or None when it cannot be read."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        pass
+    try:  # no /proc (macOS)
+        return int(subprocess.check_output(["ps", "-o", "rss=", "-p", str(pid)])) / 2**10
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return None
+
+
+async def _sample_rss(pid, samples):
+    while True:
+        rss = server_rss_mb(pid)
+        if rss is not None:
+            samples.append(rss)
+        await asyncio.sleep(SAMPLE_INTERVAL)
+
+
+async def run_level(url, n_sessions, account, args, pid=None):
+    """`n_sessions` concurrent sessions for args.duration seconds; returns one record per section plus a total."""
+    latencies, errors, samples = defaultdict(list), [], []
+    sampler = asyncio.create_task(_sample_rss(pid, samples)) if pid else None
+    deadline = time.monotonic() + args.duration
+    start, cpu_start = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(run_session(url, account, deadline, random.Random(args.seed * 1000 + i), args,
+                                       latencies, errors)
+                           for i in range(n_sessions)))
+    elapsed, client_cpu = time.perf_counter() - start, time.process_time() - cpu_start
+    if sampler is not None:
+        sampler.cancel()
+
+    records = []
+    for section, seconds in [*latencies.items(), ("all", [s for v in latencies.values() for s in v])]:
+        if not seconds:
+            continue
+        p = np.percentile(seconds, PERCENTILES) * 1000
+        records.append({"sessions": n_sessions, "section": section, "reruns": len(seconds),
+                        **{f"p{q}_ms": float(v) for q, v in zip(PERCENTILES, p)},
+                        "max_ms": max(seconds) * 1000})
+    total = records[-1] if records else {"sessions": n_sessions, "section": "all", "reruns": 0}
+    total.update({"seconds": elapsed, "throughput": total["reruns"] / elapsed, "errors": len(errors),
+                  "client_cpu_seconds": client_cpu,
+                  "rss_start_mb": samples[0] if samples else None,
+                  "rss_peak_mb": max(samples) if samples else None,
+                  "rss_end_mb": samples[-1] if samples else None})
+    if not records:
+        records.append(total)
+    return records, errors
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port, env, log_path, timeout=60):
+    """`streamlit run app` on `port`; returns the process once its health check answers."""
+    with open(log_path, "w") as log:
+        server = subprocess.Popen([sys.executable, "-m", "streamlit", "run", app,
+                                   "--server.headless", "true", "--server.address", "127.0.0.1",
+                                   "--server.port", str(port), "--server.fileWatcherType", "none",
+                                   "--browser.gatherUsageStats", "false"],
+                                  env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return server
+        except OSError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                raise SystemExit(f"The server did not start; see {log_path}")
+            time.sleep(0.2)
+
+
+async def warm_up(url, account, pages):
+    """Visit every section once so the measured levels do not include the first data load."""
+    session = AppSession(url)
+    try:
+        await session.connect()
+        await session.login(*account)
+        for section in pages:
+            await session.navigate(section)
+    finally:
+        await session.close()
+    return session.errors
+
+
+def print_level(records, errors):
+    total = records[-1]
+    rss = (f", server RSS {total['rss_start_mb']:.0f} -> peak {total['rss_peak_mb']:.0f} MB"
+           if total["rss_peak_mb"] is not None else "")
+    print(f"\n{total['sessions']} sessions: {total['reruns']} reruns in {total['seconds']:.1f}s, "
+          f"{total['throughput']:.2f} reruns/s, {total['errors']} errors{rss}, "
+          f"client CPU {total['client_cpu_seconds']:.1f}s")
+    for r in records:
+        if r["reruns"]:
+            print(f"  {r['section']:<22} {r['reruns']:>6}  p50 {r['p50_ms']:>8.0f} ms  p95 {r['p95_ms']:>8.0f} ms"
+                  f"  p99 {r['p99_ms']:>8.0f} ms  max {r['max_ms']:>8.0f} ms")
+    for error in sorted(set(errors))[:5]:
+        print(f"  error: {error}")
+
+
+async def run_levels(url, account, args, pid):
+    start = time.perf_counter()
+    errors = await warm_up(url, account, args.pages)
+    print(f"Warm-up visit of every section: {time.perf_counter() - start:.1f}s"
+          + (f" ({len(errors)} errors: {errors[0]})" if errors else ""))
+    all_records = []
+    for n_sessions in args.sessions:
+        records, errors = await run_level(url, n_sessions, account, args, pid)
+        print_level(records, errors)
+        all_records += records
+    return all_records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the dashboard with concurrent sessions.")
+    parser.add_argument("--sessions", nargs="+", type=int, default=DEFAULT_SESSIONS,
+                        help="concurrency levels, run one after the other")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per concurrency level")
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between a session's reruns")
+    parser.add_argument("--interactions", type=int, default=2, help="filter changes per section visit")
+    parser.add_argument("--pages", nargs="+", default=PAGES, help="sections the sessions visit")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds before a rerun counts as failed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--app", default=APP_FILE, help="script started with `streamlit run`")
+    parser.add_argument("--url", help="test an already running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="process id of the --url server, for its memory")
+    parser.add_argument("--email", default=LOAD_TEST_EMAIL, help="account the sessions log in with (with --url)")
+    parser.add_argument("--password", default=LOAD_TEST_PASSWORD)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    account = (args.email, args.password)
+    with tempfile.TemporaryDirectory(prefix="sales-load-") as tmp:
+        server = None
+        if args.url:
+            url, pid = args.url, args.pid
+        else:
+            user_db = os.path.join(tmp, "users.db")
+            UserStore(user_db, legacy_csv=None).register(*account)
+            port = _free_port()
+            server = start_server(args.app, port, {**os.environ, "SALES_USER_DB": user_db},
+                                  os.path.join(tmp, "server.log"))
+            url, pid = f"http://127.0.0.1:{port}", server.pid
+        try:
+            records = asyncio.run(run_levels(url, account, args, pid))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(records, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
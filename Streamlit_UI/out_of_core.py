@@ -0,0 +1,169 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import streamlit as st
+
+import figures
+import timeseries
+from data_loader import DATA_COLUMNS, data_source, open_dataset, scan_batches
+from dataset_view import write_export
+from filters import is_selected
+from rollup import filter_cube, kpis
+
+
+class ScanEngine:
+    """Row-level queries streamed from the Parquet dataset, for data larger than RAM.
+
+    Implements the same interface as filters.FilterIndex, so pages can use either one.
+    Filters are pushed down to the Parquet scan (Branch and year also prune partitions),
+    totals and counts come from the rollup cube, and only one batch is held at a time.
+    """
+
+    sortable = False
+
+    def __init__(self, path, cube):
+        if not os.path.isdir(path):
+            raise ValueError(f"Out-of-core mode reads the Parquet dataset; run ingest.py to build {path!r}")
+        self.path = path
+        self.cube = cube
+        self.columns = list(DATA_COLUMNS)
+        # Listing the partition files is the slow part of opening a scan, so it is done once
+        self._dataset = open_dataset(path)
+        self._schema = self._dataset.schema
+
+    def _filter(self, start, end, equals):
+        conditions = []
+        for col, value in equals.items():
+            if not is_selected(value):
+                continue
+            if pd.api.types.is_list_like(value):
+                conditions.append(ds.field(col).isin([str(v) for v in value]))
+            else:
+                conditions.append(ds.field(col) == str(value))
+
+        date_type = self._schema.field("date").type
+        if start is not None:
+            start = pd.Timestamp(start).normalize()
+            conditions += [ds.field("year") >= start.year, ds.field("date") >= pa.scalar(start, type=date_type)]
+        if end is not None:
+            end = pd.Timestamp(end).normalize()
+            conditions += [ds.field("year") <= end.year, ds.field("date") <= pa.scalar(end, type=date_type)]
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def batches(self, columns=None, start=None, end=None, **equals):
+        """Matching rows as a stream of pandas frames."""
+        return scan_batches(self._dataset, columns or self.columns, self._filter(start, end, equals))
+
+    def values(self, column):
+        return sorted(self.cube[column].dropna().unique())
+
+    def date_bounds(self):
+        dates = self.cube["date"]
+        return dates.min(), dates.max()
+
+    def kpis(self, start=None, end=None):
+        return kpis(filter_cube(self.cube, start=start, end=end))
+
+    def count(self, **equals):
+        return int(filter_cube(self.cube, **equals)["count"].sum())
+
+    def value_range(self, column, start=None, end=None, **equals):
+        """Min and max of `column` from the Parquet statistics of the files the filters can match.
+
+        Only the file footers are read. The range covers every row of those files, so it can be
+        wider than the matching rows alone; None when a file was written without statistics.
+        """
+        lo, hi = np.inf, -np.inf
+        for fragment in self._dataset.get_fragments(filter=self._filter(start, end, equals)):
+            metadata = fragment.metadata
+            index = metadata.schema.to_arrow_schema().get_field_index(column)
+            for i in range(metadata.num_row_groups):
+                row_group = metadata.row_group(i)
+                stats = row_group.column(index).statistics
+                if stats is not None and stats.has_min_max:
+                    lo, hi = min(lo, stats.min), max(hi, stats.max)
+                elif stats is None or stats.null_count < row_group.num_rows:
+                    return None  # values without statistics (all-null row groups have none to give)
+        return (lo, hi) if np.isfinite(lo) else (None, None)
+
+    def histogram(self, x, nbins=20, color=None, start=None, end=None, **equals):
+        """Bin counts of `x` in one streaming pass, with the bins spanning value_range()."""
+        bounds = self.value_range(x, start, end, **equals)
+        if bounds is None:
+            lo, hi = np.inf, -np.inf
+            for batch in self.batches([x], start, end, **equals):
+                lo, hi = min(lo, batch[x].min()), max(hi, batch[x].max())
+            bounds = (lo, hi) if np.isfinite(lo) else (None, None)
+        edges = figures.bin_edges(*bounds, nbins)
+
+        columns = [x] if color is None else [x, color]
+        groups = self.values(color) if color is not None else None
+        return figures.bin_counts(self.batches(columns, start, end, **equals), x, edges, color=color, groups=groups)
+
+    def trend(self, measure, granularity="month", how="sum", start=None, end=None, **equals):
+        """Per-bucket sum (or mean) of `measure` at `granularity`, accumulated batch by batch."""
+        partials = []
+        for batch in self.batches(["datetime", measure], start, end, **equals):
+            hours, months = timeseries.time_keys(batch["datetime"])
+            values = batch[measure].to_numpy(dtype="float64", na_value=np.nan)
+            partials.append(timeseries.partial_sums(hours, months, values, granularity))
+        return timeseries.trend_frame(timeseries.combine(partials), measure, granularity, how)
+
+    def page(self, page, page_size, sort_by=None, ascending=True, **equals):
+        """One page of matching rows in scan order (sorting needs the in-memory FilterIndex)."""
+        skip, parts, remaining = page * page_size, [], page_size
+        for batch in self.batches(**equals):
+            if skip >= len(batch):
+                skip -= len(batch)
+                continue
+            parts.append(batch.iloc[skip:skip + remaining])
+            remaining -= len(parts[-1])
+            skip = 0
+            if remaining == 0:
+                break
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=self.columns)
+
+    def describe(self, **equals):
+        """Streaming count/mean/std/min/max per numeric column (quantiles need all values at once)."""
+        numeric = [field.name for field in self._schema
+                   if field.name in self.columns and (pa.types.is_integer(field.type) or pa.types.is_floating(field.type))]
+        stats = {col: np.array([0.0, 0.0, 0.0, np.inf, -np.inf]) for col in numeric}
+
+        for batch in self.batches(numeric, **equals):
+            for col in numeric:
+                values = batch[col].to_numpy(dtype="float64", na_value=np.nan)
+                values = values[~np.isnan(values)]
+                if len(values):
+                    s = stats[col]
+                    s[0] += len(values)
+                    s[1] += values.sum()
+                    s[2] += np.square(values).sum()
+                    s[3], s[4] = min(s[3], values.min()), max(s[4], values.max())
+
+        summary = {}
+        for col, (n, total, sumsq, lo, hi) in stats.items():
+            mean = total / n if n else np.nan
+            std = np.sqrt(max(sumsq - total * mean, 0) / (n - 1)) if n > 1 else np.nan
+            summary[col] = pd.Series({"count": n, "mean": mean, "std": std,
+                                      "min": lo if n else np.nan, "max": hi if n else np.nan})
+        return pd.DataFrame(summary)
+
+    def export(self, file_format="csv", **equals):
+        return write_export(self.batches(**equals), file_format, pd.DataFrame(columns=self.columns))
+
+
+@st.cache_resource(max_entries=2)
+def _load_scan_engine(path, version, _cube):
+    return ScanEngine(path, _cube)
+
+
+def load_scan_engine(cube):
+    """Return the ScanEngine for the current Parquet dataset, once per data version."""
+    return _load_scan_engine(*data_source(), cube)
@@ -0,0 +1,124 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import data_source
+from instrumentation import trace_stage
+
+
+# Byte budget shared by all sessions of this process
+QUERY_CACHE_MB = float(os.environ.get("SALES_QUERY_CACHE_MB", "256"))
+
+
+def _sizeof(value):
+    # Approximate retained size of a cached result
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _normalize(value):
+    # "2021-01-01", date(2021, 1, 1) and Timestamp("2021-01-01") are the same selection
+    if isinstance(value, (pd.Timestamp, np.datetime64)) or hasattr(value, "isoformat"):
+        return pd.Timestamp(value).normalize().isoformat()
+    if pd.api.types.is_list_like(value):
+        return tuple(sorted(map(str, value)))
+    return value
+
+
+class QueryCache:
+    """LRU cache of per-section results (KPI values, aggregated chart frames) by filter selection.
+
+    Entries are evicted least-recently-used first once their total size exceeds `max_bytes`,
+    and the whole cache is dropped when the dataset version changes.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def _check_version(self, version):
+        if version != self._version:
+            self._entries.clear()
+            self.bytes = 0
+            self._version = version
+
+    def get_or_compute(self, key, compute, version, record=None):
+        """The cached value for `key`, else `compute()`; its size goes in `record["bytes"]` if given.
+
+        A result is sized once, when it is computed, and hits reuse that size.
+        """
+        with self._lock:
+            self._check_version(version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value, size = self._entries[key]
+                if record is not None:
+                    record["bytes"] = size
+                return value
+            self.misses += 1
+
+        # Computed outside the lock so other sessions are not blocked meanwhile
+        value = compute()
+        size = _sizeof(value)
+        if record is not None:
+            record["bytes"] = size
+
+        with self._lock:
+            self._check_version(version)
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self.bytes -= evicted_size
+                    self.evictions += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+@st.cache_resource
+def get_query_cache():
+    """The process-wide QueryCache."""
+    return QueryCache(int(QUERY_CACHE_MB * 1024 * 1024))
+
+
+def cached_query(section, filters, compute):
+    """Return `compute()` for this section and filter selection, reusing a cached result.
+
+    `filters` holds the selections the result depends on; `compute` must not depend on
+    anything else except the dataset itself.
+    """
+    key = (section, tuple(sorted((col, _normalize(value)) for col, value in filters.items())))
+    with trace_stage(f"query {section}") as stage:
+        value = get_query_cache().get_or_compute(key, compute, data_source(), stage)
+    return value
@@ -0,0 +1,140 @@
+"""Render every dashboard figure (fig1-fig12) per branch and per city into static report bundles.
+
+Usage:
+    python report.py                                # every branch and city, HTML, into ../Report
+    python report.py --by Branch --format html png  # branches only, HTML plus PNG (needs kaleido)
+    python report.py --workers 8 --granularity week
+
+Reports are rendered by a pool of worker processes. The cleaned dataset is snapshotted
+once and memory-mapped by every worker (see data_loader.load_sales_data), and the
+rollup cube is built once and handed to each worker.
+"""
+import argparse
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import charts
+from data_loader import OUT_OF_CORE, data_source, load_sales_data, shared_snapshot
+from filters import FilterIndex
+from out_of_core import ScanEngine
+from rollup import filter_cube, load_cube, rollup
+
+
+REPORT_DIR = os.path.join(os.pardir, "Report")
+REPORT_KINDS = ["Branch", "City"]
+
+# Set in each worker process by _init_worker
+_engine = _cube = None
+
+
+def report_figures(engine, cube, granularity="month", **scope):
+    """All dashboard figures restricted to `scope` (e.g. Branch="WALM001"), in page order."""
+    scoped = filter_cube(cube, **scope)
+    quantity_sold = rollup(scoped, "category", "quantity")
+    return {
+        "fig1": charts.revenue_trend(engine.trend("Revenue", granularity, **scope)),
+        "fig2": charts.revenue_by_category_pie(rollup(scoped, "category", "Revenue")),
+        "fig3": charts.revenue_histogram(engine.histogram("Revenue", nbins=20, **scope)),
+        "fig4": charts.rating_histogram_by_payment(engine.histogram("rating", nbins=20, color="payment_method", **scope)),
+        "fig5": charts.revenue_by_payment_pie(rollup(scoped, "payment_method", "Revenue")),
+        "fig6": charts.top_cities_by_revenue(rollup(scoped, "City", "Revenue", "mean")),
+        "fig7": charts.profit_trend(engine.trend("Profit", granularity, "mean", **scope)),
+        "fig8": charts.quantity_by_category_pie(quantity_sold),
+        "fig9": charts.revenue_by_category_bar(rollup(scoped, "category", "Revenue")),
+        "fig10": charts.category_treemap(quantity_sold),
+        "fig11": charts.top_branches_by_profit(rollup(scoped, "Branch", "Profit")),
+        "fig12": charts.rating_histogram(engine.histogram("rating", nbins=20, **scope)),
+    }
+
+
+def _safe_name(value):
+    return re.sub(r"[^\w.-]+", "_", str(value)).strip("_") or "unnamed"
+
+
+def write_bundle(figs, out_dir, title, formats):
+    """Write one report: a single HTML page with every figure and/or one PNG per figure."""
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    if "html" in formats:
+        parts = [fig.to_html(full_html=False, include_plotlyjs="cdn" if i == 0 else False)
+                 for i, fig in enumerate(figs.values())]
+        path = os.path.join(out_dir, "index.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"<!DOCTYPE html>\n<html><head><meta charset='utf-8'><title>{title}</title></head>\n"
+                    f"<body><h1>{title}</h1>\n" + "\n".join(parts) + "\n</body></html>\n")
+        written.append(path)
+    if "png" in formats:
+        for name, fig in figs.items():
+            path = os.path.join(out_dir, f"{name}.png")
+            fig.write_image(path)
+            written.append(path)
+    return written
+
+
+def _init_worker(cube):
+    global _engine, _cube
+    # Streamlit's caches warn about running without a session; expected here
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    _cube = cube
+    if OUT_OF_CORE:
+        _engine = ScanEngine(data_source()[0], cube)
+    else:
+        _engine = FilterIndex(load_sales_data())
+
+
+def render_report(kind, value, out_root, formats, granularity):
+    """Render the report for one branch or city; returns its paths and timing."""
+    start = time.perf_counter()
+    figs = report_figures(_engine, _cube, granularity, **{kind: value})
+    out_dir = os.path.join(out_root, kind.lower(), _safe_name(value))
+    paths = write_bundle(figs, out_dir, f"Sales Report: {kind} {value}", formats)
+    return kind, value, time.perf_counter() - start, paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render static per-branch and per-city sales reports.")
+    parser.add_argument("--by", nargs="+", choices=REPORT_KINDS, default=REPORT_KINDS, help="report kinds")
+    parser.add_argument("--format", nargs="+", choices=["html", "png"], default=["html"], dest="formats")
+    parser.add_argument("--out", default=REPORT_DIR, help="output directory (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--granularity", default="month", help="time buckets of the trend charts")
+    args = parser.parse_args()
+
+    if "png" in args.formats:
+        try:
+            import kaleido  # noqa: F401  (plotly's static image export backend)
+        except ImportError:
+            raise SystemExit("PNG export needs kaleido: pip install kaleido")
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    wall_start = time.perf_counter()
+    if not OUT_OF_CORE:
+        # Write the shared snapshot once, before the workers map it
+        shared_snapshot(*data_source())
+    cube = load_cube()
+    jobs = [(kind, value) for kind in args.by for value in sorted(cube[kind].dropna().unique())]
+    print(f"Rendering {len(jobs)} reports with {args.workers} workers "
+          f"(setup {time.perf_counter() - wall_start:.1f}s)")
+
+    timings = []
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(cube,)) as pool:
+        futures = [pool.submit(render_report, kind, value, args.out, args.formats, args.granularity)
+                   for kind, value in jobs]
+        for future in as_completed(futures):
+            kind, value, seconds, paths = future.result()
+            timings.append(seconds)
+            print(f"{kind} {value}: {len(paths)} files in {seconds:.2f}s")
+
+    wall = time.perf_counter() - wall_start
+    if timings:
+        print(f"{len(timings)} reports in {wall:.1f}s wall time; per report: "
+              f"median {np.median(timings):.2f}s, p95 {np.percentile(timings, 95):.2f}s, max {max(timings):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
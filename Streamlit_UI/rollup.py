@@ -0,0 +1,143 @@
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import CUBE_FILE, OUT_OF_CORE, data_source, load_sales_data, scan_batches
+from filters import is_selected
+
+
+# Grain of the cube: one row per day x Branch x City x category x payment_method
+DIMENSIONS = ["date", "Branch", "City", "category", "payment_method"]
+MEASURES = ["Revenue", "Profit", "quantity", "rating"]
+
+def _measure_columns(measure):
+    return [f"{measure}_count", f"{measure}_sum", f"{measure}_sumsq"]
+
+
+def build_cube(df):
+    """Aggregate raw transactions to the cube grain.
+
+    `count` is the number of transactions; each measure gets its number of non-null values,
+    sum and sum of squares, so means stay right when some values are missing.
+    """
+    values = df[MEASURES].astype("float64")
+    squares = (values ** 2).add_suffix("_sumsq")
+    parts = pd.concat([df[DIMENSIONS], values.add_suffix("_sum"), squares], axis=1)
+
+    cube = parts.groupby(DIMENSIONS, observed=True, sort=False, dropna=False).agg(
+        count=("Revenue_sum", "size"),
+        **{f"{m}_{stat}": (f"{m}_{stat}", "sum") for m in MEASURES for stat in ("sum", "sumsq")},
+        **{f"{m}_count": (f"{m}_sum", "count") for m in MEASURES},
+    )
+    return cube.reset_index()
+
+
+def merge_cubes(*cubes):
+    """Combine cubes built from disjoint rows; every cube column is additive."""
+    cubes = [cube for cube in cubes if cube is not None]
+    merged = pd.concat(cubes, ignore_index=True)
+    for col in DIMENSIONS[1:]:
+        merged[col] = merged[col].astype("category")
+    if len(cubes) == 1:
+        return merged
+    return merged.groupby(DIMENSIONS, observed=True, sort=False, dropna=False).sum().reset_index()
+
+
+def build_cube_from_batches(batches):
+    """Build the cube from a stream of row batches, holding one batch at a time."""
+    cube = None
+    for batch in batches:
+        cube = merge_cubes(cube, build_cube(batch))
+    return cube
+
+
+def read_cube(path):
+    """The cube stored in a Parquet dataset directory, or None if it has none."""
+    cube_file = os.path.join(path, CUBE_FILE)
+    if not os.path.exists(cube_file):
+        return None
+    cube = pd.read_parquet(cube_file)
+    if all(f"{m}_count" in cube for m in MEASURES):
+        return cube
+    # Stored before the cube kept per-measure value counts: rebuild it from the rows
+    return build_cube_from_batches(scan_batches(path, DIMENSIONS + MEASURES))
+
+
+def filter_cube(cube, start=None, end=None, **equals):
+    """Restrict the cube to a date range and dimension values.
+
+    Each keyword is a dimension; pass a single value, a list of values, or "All"/None to skip it.
+    """
+    mask = np.ones(len(cube), dtype=bool)
+    if start is not None:
+        mask &= (cube["date"] >= pd.to_datetime(start)).to_numpy()
+    if end is not None:
+        mask &= (cube["date"] <= pd.to_datetime(end)).to_numpy()
+
+    for col, value in equals.items():
+        if not is_selected(value):
+            continue
+        if pd.api.types.is_list_like(value):
+            mask &= cube[col].isin(list(value)).to_numpy()
+        else:
+            mask &= (cube[col] == value).to_numpy()
+
+    return cube if mask.all() else cube[mask]
+
+
+def _finish(sums, measure, how):
+    # Turn summed columns into the requested statistic, over the measure's non-null values
+    n, total, sumsq = (sums[col] for col in _measure_columns(measure))
+    if how == "sum":
+        return total
+    if how == "count":
+        return n
+    if how == "mean":
+        return total / n
+    if how == "std":
+        return np.sqrt(np.maximum(sumsq - total ** 2 / n, 0) / (n - 1))
+    raise ValueError(f"Unknown aggregation: {how}")
+
+
+def rollup(cube, by, measure, how="sum"):
+    """Aggregate `measure` ("sum", "mean", "count" or "std") grouped by one or more dimensions.
+
+    "count" is the number of non-null values of `measure`; the cube's `count` column counts transactions.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    sums = cube[_measure_columns(measure)].groupby([cube[key] for key in by], observed=True).sum()
+    return _finish(sums, measure, how).rename(measure).reset_index()
+
+
+def totals(cube, measure, how="sum"):
+    """Single KPI value for the (filtered) cube."""
+    sums = cube[_measure_columns(measure)].sum()
+    if sums[f"{measure}_count"] == 0:
+        return 0.0 if how in ("sum", "count") else float("nan")
+    return float(_finish(sums, measure, how))
+
+
+def kpis(cube):
+    """Total Revenue/Profit and mean rating, in the same shape as filters.DateIndex.kpis."""
+    return {"Revenue": totals(cube, "Revenue"), "Profit": totals(cube, "Profit"), "rating": totals(cube, "rating", "mean")}
+
+
+@st.cache_resource(show_spinner="Building rollups...", max_entries=2)
+def _load_cube(path, version):
+    cube = read_cube(path) if os.path.isdir(path) else None
+    if cube is not None:
+        return merge_cubes(cube)
+    if OUT_OF_CORE:
+        return build_cube_from_batches(scan_batches(path, DIMENSIONS + MEASURES))
+    return build_cube(load_sales_data(DIMENSIONS + MEASURES, path))
+
+
+def load_cube():
+    """Return the rollup cube for the current dataset, once per data version.
+
+    Uses the cube that ingest.py keeps up to date next to the Parquet dataset when there
+    is one, otherwise builds it from the transactions.
+    """
+    return _load_cube(*data_source())
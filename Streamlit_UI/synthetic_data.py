@@ -0,0 +1,130 @@
+"""Generate synthetic sales CSVs in the raw Walmart format, at any size.
+
+Usage:
+    python synthetic_data.py 1M --out Wallmart_1M.csv
+    python synthetic_data.py 50M --out Wallmart_50M.csv --seed 7
+
+Branches (with their cities), categories (with their profit margins), payment methods,
+quantities, ratings and times are sampled from the frequencies in a template file
+(DATA_FILE by default); dates are spread uniformly over its date range and written in
+the same two formats the raw file mixes.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DATA_FILE, clean_sales_data
+
+
+CHUNK_ROWS = 1_000_000
+SIZE_SUFFIXES = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+
+
+def parse_size(text):
+    """"100K", "1M", "2.5M" or "5000" -> number of rows."""
+    text = text.strip().upper()
+    if text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def _frequencies(series):
+    counts = series.value_counts()
+    return counts.index.to_numpy(), (counts / counts.sum()).to_numpy()
+
+
+class SalesProfile:
+    """Value frequencies of a template sales CSV, used to sample new rows."""
+
+    def __init__(self, template=DATA_FILE):
+        raw = pd.read_csv(template)
+        self.header = list(raw.columns)  # raw names, with their stray spaces
+        df = clean_sales_data(raw)
+
+        self.branches, self.branch_p = _frequencies(df["Branch"].astype(str))
+        branch_city = df.groupby("Branch", observed=True)["City"].agg(lambda s: s.mode().iloc[0])
+        self.branch_city = branch_city.astype(str).reindex(self.branches).to_numpy()
+
+        self.categories, self.category_p = _frequencies(df["category"].astype(str))
+        margins = df.groupby("category", observed=True)["profit_margin"].agg(lambda s: s.mode().iloc[0])
+        self.category_margin = margins.reindex(self.categories).to_numpy()
+
+        self.payments, self.payment_p = _frequencies(df["payment_method"].astype(str))
+        self.quantities, self.quantity_p = _frequencies(df["quantity"].dropna())
+        self.ratings, self.rating_p = _frequencies(df["rating"].dropna())
+        self.times, self.time_p = _frequencies(df["time"].dropna())
+        self.price_range = float(df["unit_price"].min()), float(df["unit_price"].max())
+        self.date_range = df["date"].min(), df["date"].max()
+
+    def sample(self, n, rng, first_id=1):
+        """`n` raw rows (money as "$12.34 ", day-first dates), in the template's column order."""
+        branch = rng.choice(len(self.branches), size=n, p=self.branch_p)
+        category = rng.choice(len(self.categories), size=n, p=self.category_p)
+        unit_price = np.round(rng.uniform(*self.price_range, size=n), 2)
+        quantity = rng.choice(self.quantities, size=n, p=self.quantity_p).astype("int64")
+        margin = self.category_margin[category]
+        revenue = np.round(unit_price * quantity, 2)
+
+        start, end = self.date_range
+        days = rng.integers(0, (end - start).days + 1, size=n)
+        dates = pd.DatetimeIndex(start + pd.to_timedelta(days, unit="D"))
+        day, month = dates.day.astype(str), dates.month.astype(str)
+        # Half "5/1/2019", half "05/01/19", like the raw export
+        long_form = day + "/" + month + "/" + dates.year.astype(str)
+        short_form = dates.strftime("%d/%m/%y")
+        date_text = np.where(rng.random(n) < 0.5, long_form, short_form)
+
+        columns = [
+            np.arange(first_id, first_id + n),
+            self.branches[branch],
+            self.branch_city[branch],
+            self.categories[category],
+            _money(unit_price),
+            quantity,
+            date_text,
+            rng.choice(self.times, size=n, p=self.time_p),
+            rng.choice(self.payments, size=n, p=self.payment_p),
+            rng.choice(self.ratings, size=n, p=self.rating_p),
+            margin,
+            _money(revenue),
+            _money(np.round(revenue * margin, 2)),
+        ]
+        return pd.DataFrame(dict(zip(self.header, columns)))
+
+
+def _money(values):
+    return "$" + pd.Series(values).map("{:.2f} ".format)
+
+
+def generate_csv(rows, out_path, template=DATA_FILE, seed=0, chunk_rows=CHUNK_ROWS):
+    """Write `rows` synthetic rows to `out_path`, chunk by chunk so memory stays bounded."""
+    profile = SalesProfile(template)
+    rng = np.random.default_rng(seed)
+    written = 0
+    while written < rows:
+        n = min(chunk_rows, rows - written)
+        chunk = profile.sample(n, rng, first_id=written + 1)
+        chunk.to_csv(out_path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+        written += n
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic sales CSV in the raw Walmart format.")
+    parser.add_argument("rows", help="number of rows, e.g. 100K, 1M, 50M")
+    parser.add_argument("--out", help="output CSV (default: Wallmart_<rows>.csv)")
+    parser.add_argument("--template", default=DATA_FILE, help="CSV whose value frequencies are sampled")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = parse_size(args.rows)
+    out_path = args.out or f"Wallmart_{args.rows.upper()}.csv"
+    start = time.perf_counter()
+    generate_csv(rows, out_path, args.template, args.seed)
+    print(f"Wrote {rows:,} rows to {out_path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
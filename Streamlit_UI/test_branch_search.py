@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from branch_search import BranchSearch
+from rollup import DIMENSIONS, build_cube
+
+
+CODES = [f"WALM{i:03d}" for i in range(1, 121)] + ["MX10", "X10A"]
+
+
+@pytest.fixture
+def sales():
+    rng = np.random.default_rng(2)
+    n = 2000
+    df = pd.DataFrame({
+        "date": pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 30, size=n), unit="D"),
+        "Branch": np.resize(CODES, n),
+        "City": "Dallas",
+        "category": rng.choice(["Food", "Home"], size=n),
+        "payment_method": "Cash",
+        "Revenue": rng.uniform(10, 500, size=n),
+        "Profit": rng.uniform(1, 200, size=n),
+        "quantity": rng.integers(1, 10, size=n).astype("float64"),
+        "rating": rng.uniform(1, 10, size=n).round(1),
+    })
+    df.loc[::3, "rating"] = np.nan
+    for col in DIMENSIONS[1:]:
+        df[col] = df[col].astype("category")
+    return df
+
+
+@pytest.fixture
+def search(sales):
+    return BranchSearch(build_cube(sales))
+
+
+def test_find_is_a_case_insensitive_substring_match(search):
+    expected = [code for code in CODES if "m01" in code.lower()]
+    assert sorted(search.find(" wALm01 ")) == sorted(expected)
+    assert search.find("walm13") == []
+    assert search.find("") == []
+
+
+def test_find_ranks_prefix_matches_first_then_alphabetically(search):
+    assert search.find("x10") == ["X10A", "MX10"]
+    assert search.find("10") == ["MX10", "WALM010", "WALM100", "WALM101", "WALM102", "WALM103", "WALM104",
+                                 "WALM105", "WALM106", "WALM107", "WALM108", "WALM109", "WALM110", "X10A"]
+    assert search.suggest("walm00", limit=3) == ["WALM001", "WALM002", "WALM003"]
+
+
+@pytest.mark.parametrize("typo, code", [("wlam017", "WALM017"), ("walm0177", "WALM017"), ("WAML117", "WALM117")])
+def test_similar_offers_the_intended_code_for_typos(search, typo, code):
+    assert search.find(typo) == []
+    assert search.similar(typo)[0] == code
+
+
+def test_similar_offers_nothing_for_unrelated_queries(search):
+    assert search.similar("zzzz") == []
+    assert search.similar("") == []
+
+
+def test_kpis_match_the_rows_of_the_branches(sales, search):
+    branches = ["WALM003", "WALM100"]
+    rows = sales[sales["Branch"].isin(branches)]
+    assert search.kpis(branches) == pytest.approx({"Revenue": rows["Revenue"].sum(), "Profit": rows["Profit"].sum(),
+                                                   "quantity": rows["quantity"].sum(), "rating": rows["rating"].mean()})
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from dataset_view import describe_rows, write_export
+
+
+def branch_chunk(first_id, n_branches):
+    """A chunk whose Branch categories need int8 codes (<128 categories) or int16 codes."""
+    branches = [f"WALM{i:03d}" for i in range(1, n_branches + 1)]
+    return pd.DataFrame({
+        "invoice_id": np.arange(first_id, first_id + n_branches),
+        "Branch": pd.Categorical(branches),
+        "Revenue": np.linspace(1, 2, n_branches, dtype="float32"),
+    })
+
+
+@pytest.mark.parametrize("sizes", [(3, 200), (200, 3), (50, 127, 128)])
+def test_parquet_export_accepts_chunks_with_different_category_widths(sizes):
+    chunks = [branch_chunk(sum(sizes[:i]), n) for i, n in enumerate(sizes)]
+    exported = pq.read_table(write_export(iter(chunks), "parquet", chunks[0].iloc[:0])).to_pandas()
+
+    expected = pd.concat([c.astype({"Branch": str}) for c in chunks], ignore_index=True)
+    assert len(exported) == sum(sizes)
+    assert exported["Branch"].astype(str).tolist() == expected["Branch"].tolist()
+    assert exported["invoice_id"].tolist() == expected["invoice_id"].tolist()
+
+
+def test_exports_without_rows_keep_the_columns():
+    empty = branch_chunk(0, 3).iloc[:0]
+    assert list(pq.read_table(write_export(iter([]), "parquet", empty)).column_names) == list(empty.columns)
+    csv = write_export(iter([branch_chunk(0, 3), branch_chunk(3, 2)]), "csv", empty).read().decode()
+    assert csv.splitlines()[0] == "invoice_id,Branch,Revenue" and len(csv.splitlines()) == 6
+
+
+def test_describe_rows_only_covers_the_filtered_rows():
+    df = branch_chunk(0, 10)
+    positions = np.array([1, 4, 7])
+    pd.testing.assert_frame_equal(describe_rows(df, positions), df.iloc[positions].describe())
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_loader import CATEGORY_COLUMNS, sort_by_date
+import filters
+from filters import DateIndex, FilterIndex, load_filter_index
+
+
+@pytest.fixture
+def sales():
+    """Date-sorted transactions with a few missing dates, cities and ratings."""
+    rng = np.random.default_rng(1)
+    n = 500
+    df = pd.DataFrame({
+        "date": pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 60, size=n), unit="D"),
+        "Branch": rng.choice([f"WALM{i:03d}" for i in range(1, 9)], size=n),
+        "City": rng.choice(["Dallas", "Houston", "San Antonio"], size=n),
+        "category": rng.choice(["Food", "Home", "Sports"], size=n),
+        "payment_method": rng.choice(["Cash", "Credit card", "Ewallet"], size=n),
+        "Revenue": rng.uniform(10, 500, size=n),
+        "Profit": rng.uniform(1, 200, size=n),
+        "rating": rng.uniform(1, 10, size=n).round(1),
+    })
+    df.loc[::25, "date"] = pd.NaT
+    df.loc[::30, "City"] = np.nan
+    df.loc[::4, "rating"] = np.nan
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype("category")
+    return sort_by_date(df)
+
+
+def mask_positions(df, start=None, end=None, **equals):
+    """Row positions of a plain boolean-mask filter, the reference for the indexes."""
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= (df["date"] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (df["date"] <= pd.Timestamp(end)).to_numpy()
+    for col, value in equals.items():
+        if value == "All":
+            continue
+        values = value if isinstance(value, list) else [value]
+        mask &= df[col].isin(values).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def as_array(positions, n):
+    if positions is None:
+        return np.arange(n)
+    if isinstance(positions, slice):
+        return np.arange(n)[positions]
+    return np.asarray(positions)
+
+
+@pytest.mark.parametrize("equals", [
+    {"City": "Dallas"},
+    {"City": ["Dallas", "Houston"]},
+    {"City": "Dallas", "category": "Food"},
+    {"City": ["Dallas", "San Antonio"], "category": ["Food", "Sports"], "payment_method": "Cash"},
+    {"Branch": ["WALM001", "WALM004"], "City": "All"},
+    {"City": "Nowhere"},
+    {"City": ["Houston", "Nowhere"]},
+])
+def test_select_matches_boolean_mask(sales, equals):
+    index = FilterIndex(sales)
+    np.testing.assert_array_equal(as_array(index.select(**equals), len(sales)), mask_positions(sales, **equals))
+    assert index.count(**equals) == len(mask_positions(sales, **equals))
+
+
+def test_select_without_filters_is_every_row(sales):
+    index = FilterIndex(sales)
+    assert index.select() is None
+    assert index.select(City="All", category=None) is None
+    assert index.count(City="All") == len(sales)
+
+
+def test_rows_are_ascending_and_skip_missing_values(sales):
+    index = FilterIndex(sales)
+    rows = index.rows("City", ["San Antonio", "Dallas"])
+    assert np.all(np.diff(rows) > 0)
+    assert not sales["City"].iloc[rows].isna().any()
+    assert index.values("City") == ["Dallas", "Houston", "San Antonio"]
+
+
+@pytest.mark.parametrize("start, end, equals", [
+    ("2019-01-10", "2019-01-20", {}),
+    ("2019-01-10", "2019-01-20", {"City": "Dallas", "category": ["Food", "Home"]}),
+    (None, "2019-01-05", {"payment_method": "Ewallet"}),
+    ("2019-02-20", None, {"Branch": ["WALM002", "WALM003"]}),
+    ("2019-06-01", "2019-06-30", {"City": "Dallas"}),
+])
+def test_positions_and_apply_match_boolean_mask(sales, start, end, equals):
+    index = FilterIndex(sales)
+    expected = mask_positions(sales, start, end, **equals)
+    np.testing.assert_array_equal(as_array(index.positions(start, end, **equals), len(sales)), expected)
+    pd.testing.assert_frame_equal(index.apply(start, end, **equals), sales.iloc[expected])
+
+
+def mask_kpis(df, start=None, end=None):
+    rows = df.iloc[mask_positions(df, start, end)]
+    return {"Revenue": rows["Revenue"].sum(), "Profit": rows["Profit"].sum(), "rating": rows["rating"].mean()}
+
+
+@pytest.mark.parametrize("start, end", [
+    (None, None),
+    ("2019-01-10", "2019-01-20"),
+    ("2019-01-15", "2019-01-15"),
+    ("2018-12-01", "2019-01-03"),
+    ("2019-02-25", "2019-12-31"),
+])
+def test_date_index_kpis_match_boolean_mask(sales, start, end):
+    assert DateIndex(sales).kpis(start, end) == pytest.approx(mask_kpis(sales, start, end), nan_ok=True)
+
+
+@pytest.mark.parametrize("start, end", [("2019-06-01", "2019-06-30"), ("2019-01-20", "2019-01-10")])
+def test_date_index_empty_range(sales, start, end):
+    index = DateIndex(sales)
+    lo, hi = index.row_range(start, end)
+    assert lo == hi
+    kpis = index.kpis(start, end)
+    assert kpis["Revenue"] == 0 and kpis["Profit"] == 0 and np.isnan(kpis["rating"])
+
+
+def test_date_index_leaves_out_undated_rows(sales):
+    index = DateIndex(sales)
+    dated = sales["date"].notna()
+    assert index.row_range() == (0, int(dated.sum()))
+    assert index.bounds() == (sales["date"].min(), sales["date"].max())
+    lo, hi = index.row_range("2019-01-10", "2019-01-20")
+    np.testing.assert_array_equal(np.arange(lo, hi), mask_positions(sales, "2019-01-10", "2019-01-20"))
+
+
+def test_filter_index_is_built_once_per_version_and_older_versions_are_dropped(sales, monkeypatch):
+    version = [1]
+    monkeypatch.setattr(filters, "data_source", lambda: ("sales.parquet", version[0]))
+    first = load_filter_index(sales)
+    assert load_filter_index(sales) is first
+
+    version[0] = 2
+    second = load_filter_index(sales)
+    assert second is not first
+    version[0] = 1
+    assert load_filter_index(sales) is not first  # version 1 was cleared when version 2 arrived
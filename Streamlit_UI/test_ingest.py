@@ -0,0 +1,95 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+from data_loader import CSV_DTYPES, CUBE_FILE, DATA_COLUMNS, clean_sales_data, source_version
+from ingest import MANIFEST_FILE, append_files, convert_csv, write_partitions
+from rollup import read_cube
+
+
+HEADER = "invoice_id,Branch,City,category, unit_price ,quantity,date,time,payment_method,rating,profit_margin, Revenue , Profit "
+
+
+def write_raw_csv(path, first_id, n, blank_id=False):
+    """`n` rows in the raw export format, starting at invoice `first_id`; optionally one without an id."""
+    lines = [HEADER]
+    for i in range(first_id, first_id + n):
+        invoice = "" if blank_id and i == first_id else str(i)
+        lines.append(f"{invoice},WALM00{i % 3 + 1},Dallas,Food,$10.00 ,2,{i % 28 + 1}/1/2019,1:08:00 PM,Cash,7.5,0.4,$20.00 ,$8.00 ")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    # Older than ingest.SETTLE_SECONDS, so the drop counts as finished
+    old = time.time() - 60
+    os.utime(path, (old, old))
+
+
+def test_append_keeps_cube_in_step_with_dataset_when_a_file_fails(tmp_path):
+    out_dir, drop_dir = str(tmp_path / "parquet"), tmp_path / "drop"
+    drop_dir.mkdir()
+    write_raw_csv(tmp_path / "base.csv", 1, 50)
+    convert_csv(str(tmp_path / "base.csv"), out_dir)
+
+    write_raw_csv(drop_dir / "a_day1.csv", 1000, 40)
+    write_raw_csv(drop_dir / "b_day2.csv", 2000, 40, blank_id=True)
+    rows, _ = append_files(str(drop_dir), out_dir)
+
+    assert rows == 40
+    dataset_rows = len(pd.read_parquet(out_dir, columns=["invoice_id"]))
+    assert dataset_rows == 90
+    assert int(read_cube(out_dir)["count"].sum()) == dataset_rows
+    with open(os.path.join(out_dir, MANIFEST_FILE)) as f:
+        assert list(json.load(f)) == ["a_day1.csv"]
+
+    # Once fixed, the skipped file is picked up on the next poll
+    write_raw_csv(drop_dir / "b_day2.csv", 2000, 40)
+    rows, _ = append_files(str(drop_dir), out_dir)
+    assert rows == 40
+    assert int(read_cube(out_dir)["count"].sum()) == len(pd.read_parquet(out_dir, columns=["invoice_id"])) == 130
+
+
+def test_source_version_changes_with_every_append(tmp_path):
+    out_dir, drop_dir = str(tmp_path / "parquet"), tmp_path / "drop"
+    drop_dir.mkdir()
+    write_raw_csv(tmp_path / "base.csv", 1, 50)
+    convert_csv(str(tmp_path / "base.csv"), out_dir)
+    converted = source_version(out_dir)
+    assert source_version(out_dir) == converted
+
+    write_raw_csv(drop_dir / "a_day1.csv", 1000, 40)
+    append_files(str(drop_dir), out_dir)
+    assert source_version(out_dir) != converted
+
+
+def cube_and_dataset_rows(out_dir):
+    return int(read_cube(out_dir)["count"].sum()), len(pd.read_parquet(out_dir, columns=["invoice_id"]))
+
+
+def test_append_builds_the_missing_cube_from_the_stored_rows(tmp_path):
+    out_dir, drop_dir = str(tmp_path / "parquet"), tmp_path / "drop"
+    drop_dir.mkdir()
+    write_raw_csv(tmp_path / "base.csv", 1, 50)
+    convert_csv(str(tmp_path / "base.csv"), out_dir)
+    os.remove(os.path.join(out_dir, CUBE_FILE))  # converted before the cube existed
+
+    write_raw_csv(drop_dir / "a_day1.csv", 1000, 40)
+    append_files(str(drop_dir), out_dir)
+    assert cube_and_dataset_rows(out_dir) == (90, 90)
+
+
+def test_append_catches_up_after_a_run_stopped_before_saving_the_cube(tmp_path):
+    out_dir, drop_dir = str(tmp_path / "parquet"), tmp_path / "drop"
+    drop_dir.mkdir()
+    write_raw_csv(tmp_path / "base.csv", 1, 50)
+    convert_csv(str(tmp_path / "base.csv"), out_dir)
+
+    # Partitions of a dropped file written, then the run died before the cube and manifest
+    write_raw_csv(drop_dir / "a_day1.csv", 1000, 40)
+    rows = clean_sales_data(pd.read_csv(drop_dir / "a_day1.csv", dtype=CSV_DTYPES))[DATA_COLUMNS]
+    write_partitions(rows, out_dir, tag="interrupted")
+    assert cube_and_dataset_rows(out_dir) == (50, 90)
+
+    appended, _ = append_files(str(drop_dir), out_dir)
+    assert appended == 0  # its rows are already stored
+    assert cube_and_dataset_rows(out_dir) == (90, 90)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from insights import compute_insights, insights_markdown
+from rollup import DIMENSIONS, build_cube
+
+
+def sales(datetimes, revenue):
+    n = len(datetimes)
+    df = pd.DataFrame({
+        "datetime": pd.to_datetime(datetimes),
+        "Branch": "WALM001",
+        "City": "Dallas",
+        "category": "Food",
+        "payment_method": "Cash",
+        "Revenue": revenue,
+        "Profit": np.ones(n),
+        "quantity": np.ones(n),
+        "rating": np.full(n, 7.0),
+    })
+    df["date"] = df["datetime"].dt.normalize()
+    for col in DIMENSIONS[1:]:
+        df[col] = df[col].astype("category")
+    return df
+
+
+def insights_of(df):
+    return compute_insights(build_cube(df), [df[["datetime", "Revenue", "rating"]]])
+
+
+def test_most_active_hours_rank_by_transactions_not_revenue():
+    # One large sale at 9 PM, five small ones at 10 AM and three at 2 PM
+    df = sales(["2019-03-01 21:00"] + ["2019-03-01 10:15"] * 5 + ["2019-03-02 14:30"] * 3,
+               [5000.0] + [10.0] * 5 + [20.0] * 3)
+    assert [hour for hour, _ in insights_of(df)["hours"]] == [10, 14, 21]
+    assert "10:00 AM, 2:00 PM, 9:00 PM" in insights_markdown(insights_of(df))
+
+
+def test_markdown_without_transactions_says_so():
+    markdown = insights_markdown(insights_of(sales([], [])))
+    assert "No transactions yet" in markdown
+
+
+def test_markdown_without_revenue_values_still_renders():
+    markdown = insights_markdown(insights_of(sales(["2019-03-01 10:00", "2019-03-01 11:00"], [np.nan, np.nan])))
+    assert "Highest Spend per Transaction" in markdown
@@ -0,0 +1,27 @@
+import pandas as pd
+import plotly.express as px
+import pytest
+
+import instrumentation
+from instrumentation import RenderTrace
+
+
+@pytest.fixture
+def fig():
+    return px.bar(pd.DataFrame({"x": ["a", "b", "c"], "y": [1, 2, 3]}), x="x", y="y", title="sales")
+
+
+@pytest.mark.parametrize("detailed", [False, True])
+def test_payload_sizes_are_measured_only_when_detailed(fig, monkeypatch, detailed):
+    monkeypatch.setattr(instrumentation, "METRICS_LOG", None)
+    trace = RenderTrace("Sales Overview", detailed)
+    trace.plotly_chart(fig)
+    trace.dataframe(pd.DataFrame({"x": ["a", "b"]}), "table")
+    chart, table = trace.records
+    assert (chart["rows"], table["rows"]) == (3, 2)
+    assert (chart["bytes"] is not None, table["bytes"] is not None) == (detailed, detailed)
+
+
+def test_metrics_log_turns_on_detailed_sizes(monkeypatch, tmp_path):
+    monkeypatch.setattr(instrumentation, "METRICS_LOG", str(tmp_path / "metrics.jsonl"))
+    assert RenderTrace("Dataset").detailed
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import write_partitions
+from out_of_core import ScanEngine
+from rollup import DIMENSIONS, build_cube
+
+
+@pytest.fixture
+def sales():
+    rng = np.random.default_rng(3)
+    n = 3000
+    df = pd.DataFrame({
+        "date": pd.Timestamp("2019-11-01") + pd.to_timedelta(rng.integers(0, 120, size=n), unit="D"),
+        "Branch": rng.choice(["WALM001", "WALM002", "WALM003"], size=n),
+        "City": rng.choice(["Dallas", "Houston"], size=n),
+        "category": rng.choice(["Food", "Home"], size=n),
+        "payment_method": rng.choice(["Cash", "Ewallet"], size=n),
+        "Revenue": rng.uniform(10, 500, size=n).astype("float32"),
+        "Profit": rng.uniform(1, 200, size=n).astype("float32"),
+        "quantity": rng.integers(1, 10, size=n).astype("float64"),
+        "rating": rng.uniform(1, 10, size=n).round(1),
+    })
+    df.loc[::5, "rating"] = np.nan
+    for col in DIMENSIONS[1:]:
+        df[col] = df[col].astype("category")
+    return df
+
+
+@pytest.fixture
+def engine(sales, tmp_path):
+    write_partitions(sales, str(tmp_path), tag="part")
+    return ScanEngine(str(tmp_path), build_cube(sales))
+
+
+def test_value_range_reads_the_bounds_from_parquet_statistics(sales, engine):
+    assert engine.value_range("Revenue") == (sales["Revenue"].min(), sales["Revenue"].max())
+    assert engine.value_range("rating") == (sales["rating"].min(), sales["rating"].max())
+    # Statistics cover whole files: pruning by Branch narrows them to that branch's rows
+    rows = sales[sales["Branch"] == "WALM002"]
+    assert engine.value_range("Revenue", Branch="WALM002") == (rows["Revenue"].min(), rows["Revenue"].max())
+    assert engine.value_range("Revenue", Branch="WALM009") == (None, None)
+
+
+@pytest.mark.parametrize("column", ["Revenue", "rating"])
+def test_histogram_matches_numpy(sales, engine, column):
+    counts = engine.histogram(column, nbins=10)
+    values = sales[column].dropna().to_numpy(dtype="float64")
+    expected, edges = np.histogram(values, bins=10, range=(values.min(), values.max()))
+    np.testing.assert_array_equal(counts["count"], expected)
+    np.testing.assert_allclose(counts[column], (edges[:-1] + edges[1:]) / 2)
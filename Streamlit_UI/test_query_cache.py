@@ -0,0 +1,65 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import query_cache
+from query_cache import QueryCache, _normalize
+
+
+def block(kb):
+    return np.zeros(kb * 128)  # kb KiB of float64
+
+
+def cache_with(keys, max_kb=3, version=1):
+    cache = QueryCache(max_kb * 1024)
+    for key in keys:
+        cache.get_or_compute(key, lambda: block(1), version)
+    return cache
+
+
+def computed(cache, key, version=1):
+    """Whether looking `key` up had to compute it."""
+    calls = []
+    cache.get_or_compute(key, lambda: calls.append(key) or block(1), version)
+    return bool(calls)
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = cache_with(["a", "b", "c"])
+    assert not computed(cache, "a")  # "b" is now the least recently used
+    assert computed(cache, "d")
+    assert cache.stats()["evictions"] == 1
+    assert not computed(cache, "a") and not computed(cache, "c")
+    assert computed(cache, "b")
+
+
+def test_results_larger_than_the_budget_are_not_kept():
+    cache = cache_with(["a"], max_kb=3)
+    cache.get_or_compute("big", lambda: block(4), 1)
+    assert cache.stats()["entries"] == 1 and not computed(cache, "a")
+
+
+def test_a_new_data_version_misses_and_drops_the_older_entries():
+    cache = cache_with(["a", "b"])
+    assert computed(cache, "a", version=2)
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["bytes"] == block(1).nbytes
+    assert computed(cache, "b", version=2)
+    assert computed(cache, "b", version=1)
+
+
+def test_equal_selections_share_a_key():
+    assert _normalize(date(2021, 1, 1)) == _normalize(pd.Timestamp("2021-01-01 13:00")) == _normalize(np.datetime64("2021-01-01"))
+    assert _normalize(["Food", "Home"]) == _normalize(("Home", "Food"))
+
+
+def test_results_are_sized_once_when_stored(monkeypatch):
+    sized = []
+    monkeypatch.setattr(query_cache, "_sizeof", lambda value: sized.append(value) or value.nbytes)
+    cache = QueryCache(1 << 20)
+    for _ in range(3):
+        record = {}
+        cache.get_or_compute("a", lambda: block(2), 1, record)
+        assert record["bytes"] == 2048
+    assert len(sized) == 1
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from branch_search import BranchSearch
+from filters import DateIndex
+from rollup import CUBE_FILE, DIMENSIONS, MEASURES, build_cube, filter_cube, kpis, merge_cubes, read_cube, rollup
+
+
+@pytest.fixture
+def sales():
+    """Transactions where half the ratings and some money values are missing, sorted by date."""
+    rng = np.random.default_rng(0)
+    n = 400
+    branch = rng.choice(["WALM001", "WALM002", "WALM003", "WALM004"], size=n)
+    df = pd.DataFrame({
+        "date": pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 30, size=n), unit="D"),
+        "Branch": branch,
+        "City": np.where(np.isin(branch, ["WALM001", "WALM003"]), "San Antonio", "Dallas"),
+        "category": rng.choice(["Food", "Home"], size=n),
+        "payment_method": rng.choice(["Cash", "Ewallet"], size=n),
+        "Revenue": rng.uniform(10, 500, size=n).astype("float32"),
+        "Profit": rng.uniform(1, 200, size=n).astype("float32"),
+        "quantity": rng.integers(1, 10, size=n).astype("float64"),
+        "rating": rng.uniform(1, 10, size=n).round(1),
+    })
+    df.loc[::2, "rating"] = np.nan
+    df.loc[::7, ["Revenue", "Profit"]] = np.nan
+    for col in DIMENSIONS[1:]:
+        df[col] = df[col].astype("category")
+    return df.sort_values("date", kind="stable", ignore_index=True)
+
+
+def test_cube_kpis_match_date_index_with_missing_values(sales):
+    cube = build_cube(sales)
+    for city in ["San Antonio", "Dallas"]:
+        rows = sales[sales["City"] == city].reset_index(drop=True)
+        expected = DateIndex(rows).kpis()
+        assert kpis(filter_cube(cube, City=city)) == pytest.approx(expected)
+    assert kpis(cube) == pytest.approx(DateIndex(sales).kpis())
+
+
+def test_rollup_statistics_skip_missing_values(sales):
+    cube = build_cube(sales)
+    grouped = sales.groupby("City", observed=True)
+    for how in ("mean", "std", "count"):
+        result = rollup(cube, "City", "rating", how).set_index("City")["rating"]
+        assert result.to_dict() == pytest.approx(grouped["rating"].agg(how).to_dict())
+    assert int(cube["count"].sum()) == len(sales)
+
+
+def test_branch_search_mean_rating_skips_missing_values(sales):
+    search = BranchSearch(build_cube(sales))
+    expected = sales.loc[sales["Branch"] == "WALM003", "rating"].mean()
+    assert search.kpis(["WALM003"])["rating"] == pytest.approx(expected)
+
+
+def test_merged_cubes_match_one_cube(sales):
+    half = len(sales) // 2
+    merged = merge_cubes(build_cube(sales.iloc[:half]), build_cube(sales.iloc[half:]))
+    whole = merge_cubes(build_cube(sales))
+    for measure in MEASURES:
+        for how in ("sum", "mean", "count"):
+            assert (rollup(merged, "Branch", measure, how).set_index("Branch")[measure].to_dict()
+                    == pytest.approx(rollup(whole, "Branch", measure, how).set_index("Branch")[measure].to_dict()))
+
+
+def test_read_cube_rebuilds_cubes_without_value_counts(sales, tmp_path):
+    sales[DIMENSIONS + MEASURES].to_parquet(tmp_path / "part-0.parquet", index=False)
+    stale = build_cube(sales).drop(columns=[f"{m}_count" for m in MEASURES])
+    stale.to_parquet(tmp_path / CUBE_FILE, index=False)
+
+    cube = read_cube(str(tmp_path))
+    assert kpis(filter_cube(merge_cubes(cube), City="San Antonio")) == pytest.approx(
+        DateIndex(sales[sales["City"] == "San Antonio"].reset_index(drop=True)).kpis())
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import timeseries
+
+
+# pandas resample rules with the same bucket starts (weeks start on Monday)
+RESAMPLE_RULES = {"hour": "h", "day": "D", "week": "W-MON", "month": "MS", "quarter": "QS", "year": "YS"}
+
+
+@pytest.fixture
+def sales():
+    """Timestamped revenue from mid-December 2019 to early March 2020, with missing values and times."""
+    rng = np.random.default_rng(4)
+    n = 5000
+    df = pd.DataFrame({
+        "datetime": pd.Timestamp("2019-12-15") + pd.to_timedelta(rng.integers(0, 80 * 24 * 60, size=n), unit="min"),
+        "Revenue": rng.uniform(10, 500, size=n),
+    })
+    df.loc[::11, "Revenue"] = np.nan
+    df.loc[::37, "datetime"] = pd.NaT
+    return df
+
+
+def resampled(df, measure, granularity, how):
+    rows = df.dropna(subset=["datetime"]).set_index("datetime")[measure]
+    rule = RESAMPLE_RULES[granularity]
+    closed = {"closed": "left", "label": "left"} if granularity == "week" else {}
+    grouped = rows.resample(rule, **closed)
+    expected = pd.DataFrame({"sum": grouped.sum(), "count": grouped.count()})
+    expected = expected[expected["count"] > 0]
+    values = expected["sum"] if how == "sum" else expected["sum"] / expected["count"]
+    return pd.DataFrame({"period": expected.index.as_unit("s"), measure: values.to_numpy()})
+
+
+@pytest.mark.parametrize("how", ["sum", "mean"])
+@pytest.mark.parametrize("granularity", timeseries.GRANULARITIES)
+def test_trend_matches_pandas_resample(sales, granularity, how):
+    # Two batches, combined as the out-of-core scan does
+    partials = []
+    for batch in (sales.iloc[:2000], sales.iloc[2000:]):
+        hours, months = timeseries.time_keys(batch["datetime"])
+        partials.append(timeseries.partial_sums(hours, months, batch["Revenue"].to_numpy(), granularity))
+    trend = timeseries.trend_frame(timeseries.combine(partials), "Revenue", granularity, how)
+
+    expected = resampled(sales, "Revenue", granularity, how)
+    pd.testing.assert_series_equal(trend["period"], expected["period"], check_names=False)
+    np.testing.assert_allclose(trend["Revenue"], expected["Revenue"])
+
+
+def test_buckets_cross_the_year_boundary(sales):
+    hours, months = timeseries.time_keys(sales["datetime"])
+    sums = timeseries.partial_sums(hours, months, sales["Revenue"].to_numpy(), "year")
+    starts = timeseries.bucket_starts(sums.index, "year")
+    assert list(starts) == [pd.Timestamp("2019-01-01"), pd.Timestamp("2020-01-01")]
+    weeks = timeseries.bucket_starts(timeseries.bucket_keys(hours, months, "week"), "week")
+    assert pd.Timestamp("2019-12-30") in set(weeks)  # the Monday of the week holding 2020-01-01
+    assert (weeks.dayofweek[~sales["datetime"].isna().to_numpy()] == 0).all()
+
+
+def test_rows_without_a_time_or_value_are_left_out(sales):
+    hours, months = timeseries.time_keys(sales["datetime"])
+    sums = timeseries.partial_sums(hours, months, sales["Revenue"].to_numpy(), "month")
+    assert sums["count"].sum() == (sales["datetime"].notna() & sales["Revenue"].notna()).sum()
+    assert timeseries.combine([]).empty
@@ -0,0 +1,54 @@
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from user_store import LEGACY_IMPORT_COST, PASSWORD_COST, UserStore, hash_password, needs_rehash, verify_password
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UserStore(str(tmp_path / "users.db"), legacy_csv=None)
+
+
+def stored_hash(store, email):
+    with closing(sqlite3.connect(store.path)) as connection:
+        return connection.execute("SELECT password_hash FROM users WHERE email = ?", (email,)).fetchone()[0]
+
+
+def test_verify_password_checks_the_salted_hash():
+    stored = hash_password("s3cret", cost=4)
+    assert verify_password("s3cret", stored)
+    assert not verify_password("S3cret", stored)
+    assert hash_password("s3cret", cost=4) != stored  # a fresh salt every time
+    assert not verify_password("s3cret", "not a hash")
+
+
+def test_register_and_authenticate(store):
+    assert store.register("ana@example.com", "s3cret")
+    assert not store.register("ana@example.com", "other")
+    assert store.exists("ana@example.com") and not store.exists("bob@example.com")
+    assert store.authenticate("ana@example.com", "s3cret")
+    assert not needs_rehash(stored_hash(store, "ana@example.com"))
+
+
+def test_wrong_password_and_unknown_email_are_rejected(store):
+    store.register("ana@example.com", "s3cret")
+    assert not store.authenticate("ana@example.com", "wrong")
+    assert not store.authenticate("bob@example.com", "s3cret")
+
+
+def test_legacy_accounts_are_imported_cheaply_and_rehashed_at_login(tmp_path):
+    legacy = tmp_path / "user_data.csv"
+    legacy.write_text("Email,Password\nana@example.com, s3cret \nbob@example.com,hunter2\n,missing\n")
+    store = UserStore(str(tmp_path / "users.db"), legacy_csv=str(legacy))
+
+    assert not store.exists("") and store.exists("bob@example.com")
+    imported = stored_hash(store, "ana@example.com")
+    assert imported.split("$")[1] == str(LEGACY_IMPORT_COST)
+
+    assert not store.authenticate("ana@example.com", "wrong")
+    assert stored_hash(store, "ana@example.com") == imported
+    assert store.authenticate("ana@example.com", "s3cret")
+    assert stored_hash(store, "ana@example.com").split("$")[1] == str(PASSWORD_COST)
+    assert store.authenticate("ana@example.com", "s3cret")
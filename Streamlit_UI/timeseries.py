@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+
+GRANULARITIES = ["hour", "day", "week", "month", "quarter", "year"]
+
+# Marks rows without a timestamp in the int32 key arrays
+MISSING_KEY = np.iinfo(np.int32).min
+
+
+def _int_keys(timestamps, unit):
+    values = pd.to_datetime(timestamps).to_numpy().astype(f"datetime64[{unit}]")
+    keys = values.view("int64")
+    return np.where(np.isnat(values), MISSING_KEY, keys).astype(np.int32)
+
+
+def time_keys(timestamps):
+    """Hours and months since 1970 for each timestamp, the two base keys every bucket derives from."""
+    return _int_keys(timestamps, "h"), _int_keys(timestamps, "M")
+
+
+def bucket_keys(hours, months, granularity):
+    """Integer bucket of each row at `granularity`, by integer arithmetic on the base keys."""
+    if granularity == "hour":
+        return hours
+    if granularity == "day":
+        return hours // 24
+    if granularity == "week":
+        return (hours // 24 + 3) // 7  # 1970-01-01 was a Thursday: weeks start on Monday
+    if granularity == "month":
+        return months
+    if granularity == "quarter":
+        return months // 3
+    if granularity == "year":
+        return months // 12
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def bucket_starts(keys, granularity):
+    """Timestamp at which each bucket starts, for the chart's x axis."""
+    keys = np.asarray(keys, dtype="int64")
+    if granularity == "hour":
+        starts = keys.astype("datetime64[h]")
+    elif granularity == "day":
+        starts = keys.astype("datetime64[D]")
+    elif granularity == "week":
+        starts = (keys * 7 - 3).astype("datetime64[D]")
+    elif granularity == "month":
+        starts = keys.astype("datetime64[M]")
+    elif granularity == "quarter":
+        starts = (keys * 3).astype("datetime64[M]")
+    elif granularity == "year":
+        starts = keys.astype("datetime64[Y]")
+    else:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    return pd.DatetimeIndex(starts.astype("datetime64[s]"))
+
+
+def partial_sums(hours, months, values, granularity):
+    """Per-bucket sum and count of `values`; partials from separate batches can be added together."""
+    keys = bucket_keys(hours, months, granularity)
+    values = np.asarray(values, dtype="float64")
+    valid = (hours != MISSING_KEY) & ~np.isnan(values)
+    buckets, inverse = np.unique(keys[valid], return_inverse=True)
+    return pd.DataFrame({
+        "sum": np.bincount(inverse, weights=values[valid], minlength=len(buckets)),
+        "count": np.bincount(inverse, minlength=len(buckets)),
+    }, index=pd.Index(buckets, name="bucket"))
+
+
+def combine(partials):
+    """Add up partial_sums results computed over disjoint rows."""
+    partials = [p for p in partials if len(p)]
+    if not partials:
+        return pd.DataFrame({"sum": [], "count": []}, index=pd.Index([], name="bucket", dtype="int64"))
+    return pd.concat(partials).groupby(level="bucket").sum()
+
+
+def trend_frame(sums, measure, granularity, how="sum"):
+    """Chart-ready frame: one row per bucket with its start time ("period") and the measure."""
+    values = sums["sum"] if how == "sum" else sums["sum"] / sums["count"]
+    return pd.DataFrame({"period": bucket_starts(sums.index, granularity), measure: values.to_numpy()})
@@ -0,0 +1,175 @@
+"""SQLite-backed user accounts with salted scrypt password hashes.
+
+Usage:
+    python user_store.py --benchmark                 # hashing cost per work factor, lookup latency
+    python user_store.py --benchmark --users 1000000
+"""
+import argparse
+import csv
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+
+import streamlit as st
+
+
+USER_DB_FILE = os.environ.get("SALES_USER_DB", "user_data.db")
+# Accounts from the old plain-text store, imported when the database is created
+LEGACY_CSV_FILE = "user_data.csv"
+# scrypt work factor N = 2**PASSWORD_COST; each step doubles hashing time and memory
+PASSWORD_COST = int(os.environ.get("SALES_PASSWORD_COST", "14"))
+# Work factor for imported passwords, cheap enough to hash a whole legacy file at startup;
+# authenticate re-hashes each one at PASSWORD_COST on its first successful login
+LEGACY_IMPORT_COST = 4
+SCRYPT_R, SCRYPT_P = 8, 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    email TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_email ON users (email);
+"""
+
+
+def hash_password(password, cost=PASSWORD_COST):
+    """Salted scrypt hash, stored with its parameters so the cost can change later."""
+    salt = secrets.token_bytes(16)
+    n = 1 << cost
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=SCRYPT_R, p=SCRYPT_P,
+                            maxmem=256 * SCRYPT_R * n)
+    return f"scrypt${cost}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password, stored):
+    try:
+        _, cost, r, p, salt, digest = stored.split("$")
+        n, r, p = 1 << int(cost), int(r), int(p)
+        candidate = hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt), n=n, r=r, p=p,
+                                   maxmem=256 * r * n)
+    except ValueError:
+        return False
+    return hmac.compare_digest(candidate.hex(), digest)
+
+
+def needs_rehash(stored, cost=PASSWORD_COST):
+    """True when `stored` was hashed with another work factor than `cost`."""
+    return stored.split("$")[1] != str(cost)
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, timeout=10)
+    # WAL: readers never wait for a registration being written
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def _import_legacy_csv(connection, csv_path):
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = [(row["Email"].strip(), row["Password"].strip()) for row in csv.DictReader(f)
+                if row.get("Email") and row.get("Password")]
+    connection.executemany("INSERT OR IGNORE INTO users (email, password_hash, created_at) VALUES (?, ?, ?)",
+                           [(email, hash_password(password, LEGACY_IMPORT_COST), time.time()) for email, password in rows])
+
+
+class UserStore:
+    """User accounts keyed by a unique email index: O(log n) lookups and append-only registration."""
+
+    def __init__(self, path=USER_DB_FILE, legacy_csv=LEGACY_CSV_FILE):
+        self.path = path
+        new = not os.path.exists(path)
+        with closing(_connect(path)) as connection, connection:
+            connection.executescript(SCHEMA)
+            if new and legacy_csv and os.path.exists(legacy_csv):
+                _import_legacy_csv(connection, legacy_csv)
+        # Checked against unknown emails, so they take as long to reject as a wrong password
+        self._dummy_hash = hash_password(secrets.token_hex(16))
+
+    def register(self, email, password):
+        """Add an account; False if the email is already registered (also under concurrent sign-ups)."""
+        password_hash = hash_password(password)
+        try:
+            with closing(_connect(self.path)) as connection, connection:
+                connection.execute("INSERT INTO users (email, password_hash, created_at) VALUES (?, ?, ?)",
+                                   (email, password_hash, time.time()))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def exists(self, email):
+        with closing(_connect(self.path)) as connection:
+            return connection.execute("SELECT 1 FROM users WHERE email = ?", (email,)).fetchone() is not None
+
+    def authenticate(self, email, password):
+        """True when `email` is registered with `password`; upgrades the hash to PASSWORD_COST if needed."""
+        with closing(_connect(self.path)) as connection:
+            row = connection.execute("SELECT password_hash FROM users WHERE email = ?", (email,)).fetchone()
+        if row is None:
+            verify_password(password, self._dummy_hash)
+            return False
+        if not verify_password(password, row[0]):
+            return False
+        if needs_rehash(row[0]):
+            with closing(_connect(self.path)) as connection, connection:
+                connection.execute("UPDATE users SET password_hash = ? WHERE email = ? AND password_hash = ?",
+                                   (hash_password(password), email, row[0]))
+        return True
+
+
+@st.cache_resource
+def load_user_store():
+    """The UserStore for USER_DB_FILE, opened once per process."""
+    return UserStore()
+
+
+def benchmark(users=100_000, costs=range(12, 17), lookups=1_000):
+    """Print hashing time per work factor and indexed lookup latency with `users` accounts."""
+    for cost in costs:
+        start = time.perf_counter()
+        stored = hash_password("benchmark-password", cost)
+        hashed = time.perf_counter() - start
+        start = time.perf_counter()
+        verify_password("benchmark-password", stored)
+        verified = time.perf_counter() - start
+        print(f"cost {cost} (N=2**{cost}, {128 * SCRYPT_R * (1 << cost) / 2**20:.0f} MiB): "
+              f"hash {hashed * 1000:.1f} ms, verify {verified * 1000:.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = UserStore(os.path.join(tmp, "users.db"), legacy_csv=None)
+        # Lookup cost does not depend on the hash, so the bulk accounts share one
+        stored = hash_password("benchmark-password", 10)
+        start = time.perf_counter()
+        with closing(_connect(store.path)) as connection, connection:
+            connection.executemany("INSERT INTO users (email, password_hash, created_at) VALUES (?, ?, ?)",
+                                   ((f"user{i}@example.com", stored, 0.0) for i in range(users)))
+        print(f"inserted {users:,} users in {time.perf_counter() - start:.2f}s")
+
+        emails = [f"user{secrets.randbelow(users)}@example.com" for _ in range(lookups)]
+        start = time.perf_counter()
+        for email in emails:
+            store.exists(email)
+        print(f"email lookup: {(time.perf_counter() - start) / lookups * 1e6:.0f} us per call "
+              f"(including connection setup)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="User store utilities.")
+    parser.add_argument("--benchmark", action="store_true", help="time password hashing and email lookups")
+    parser.add_argument("--users", type=int, default=100_000, help="accounts in the lookup benchmark")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark(args.users)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import logging
+import threading
+
+
+# One warm-up per process; later sessions find everything already cached
+_lock = threading.Lock()
+_thread = None
+
+
+def _warm_up(section_columns):
+    # The same cached loaders the sections call, so the first visit to each one is a cache hit
+    from data_loader import OUT_OF_CORE, load_sales_data
+    from branch_search import load_branch_search
+    from filters import load_filter_index
+    from insights import load_insights
+    from out_of_core import load_scan_engine
+    from rollup import load_cube
+    import charts  # noqa: F401  (plotly.express import)
+
+    cube = load_cube()
+    if OUT_OF_CORE:
+        load_scan_engine(cube)
+    else:
+        for columns in section_columns.values():
+            load_filter_index(load_sales_data(columns))
+    load_branch_search(cube)
+    load_insights()
+
+
+def start_warm_up(section_columns):
+    """Preload the dataset, indexes and plotting modules in a background thread, once per process.
+
+    `section_columns` maps each analytics section to the columns it loads (None = all).
+    """
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_warm_up, args=(section_columns,), name="sales-warm-up", daemon=True)
+        # Cached loaders called outside a script run log "missing ScriptRunContext"; expected here
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+        _thread.start()